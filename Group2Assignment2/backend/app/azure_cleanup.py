@@ -1,11 +1,25 @@
+import asyncio
 import os
+from typing import Callable, Optional
 
-from azure.identity import AzureCliCredential
-from azure.mgmt.resource import ResourceManagementClient
+from .startup import lazy_import
 
+# Seconds between progress reports while Azure deletes the resource group
+CLEANUP_POLL_INTERVAL = float(os.environ.get("CLEANUP_POLL_INTERVAL", "5"))
 
-def cleanup_resource_group():
+# Optional factory returning an async ResourceManagementClient-like object
+# for a subscription id (e.g. a fake in tests); see configure().
+_client_factory: Optional[Callable[[str], object]] = None
 
+
+def configure(client_factory: Optional[Callable[[str], object]] = None) -> None:
+    """Use a custom async resource-management client (None restores the Azure SDK)."""
+    global _client_factory
+    _client_factory = client_factory
+
+
+def get_cleanup_settings():
+    """Return (subscription_id, resource_group_name) from the environment."""
     subscription_id = os.environ.get("AZURE_SUBSCRIPTION_ID")
     resource_group_name = os.environ.get("AZURE_RESOURCE_GROUP")
 
@@ -14,17 +28,60 @@ def cleanup_resource_group():
     if not resource_group_name:
         raise RuntimeError("AZURE_RESOURCE_GROUP environment variable is not set")
 
-    credential = AzureCliCredential()
+    return subscription_id, resource_group_name
+
 
-    client = ResourceManagementClient(credential, subscription_id)
+async def cleanup_resource_group_async(
+    progress: Callable[[str], None] = lambda message: None,
+    poll_interval: float = CLEANUP_POLL_INTERVAL,
+):
+    """
+    Deletes the configured resource group with the async Azure SDK.
+    The long-running-operation poller is awaited on the event loop (no
+    thread is blocked) and its status is reported through `progress`
+    every `poll_interval` seconds.
+    """
+    subscription_id, resource_group_name = get_cleanup_settings()
+
+    credential = None
+    if _client_factory is not None:
+        client = _client_factory(subscription_id)
+    else:
+        AzureCliCredential = lazy_import("azure.identity.aio").AzureCliCredential
+        ResourceManagementClient = lazy_import(
+            "azure.mgmt.resource.resources.aio"
+        ).ResourceManagementClient
+        credential = AzureCliCredential()
+        client = ResourceManagementClient(credential, subscription_id)
 
     try:
-        client.resource_groups.get(resource_group_name)
-    except Exception as exc:
-        raise RuntimeError(
-            f"Resource group '{resource_group_name}' not found or not accessible: {exc}"
-        )
-    poller = client.resource_groups.begin_delete(resource_group_name)
-    poller.result()
-
-    return {"deleted_resource_group": resource_group_name}
\ No newline at end of file
+        progress(f"Checking resource group '{resource_group_name}'")
+        try:
+            await client.resource_groups.get(resource_group_name)
+        except Exception as exc:
+            raise RuntimeError(
+                f"Resource group '{resource_group_name}' not found or not accessible: {exc}"
+            )
+
+        poller = await client.resource_groups.begin_delete(resource_group_name)
+        progress(f"Deleting resource group '{resource_group_name}'")
+
+        result = asyncio.ensure_future(poller.result())
+        try:
+            while True:
+                done, _ = await asyncio.wait({result}, timeout=poll_interval)
+                if done:
+                    break
+                progress(f"Deleting resource group '{resource_group_name}' ({poller.status()})")
+            result.result()
+        finally:
+            if not result.done():
+                result.cancel()
+    finally:
+        close = getattr(client, "close", None)
+        if close is not None:
+            await close()
+        if credential is not None:
+            await credential.close()
+
+    return {"deleted_resource_group": resource_group_name}
@@ -0,0 +1,110 @@
+# Process-wide Azure credential and management clients with pooled HTTP connections.
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from .startup import lazy_import
+
+# HTTP connection pool shared by every management client in this process
+AZURE_HTTP_POOL_SIZE = int(os.environ.get("AZURE_HTTP_POOL_SIZE", "16"))
+
+_lock = threading.Lock()
+_transport = None
+_credential = None
+_storage_clients: Dict[str, Any] = {}
+
+# Optional factories used instead of the real SDK (e.g. to run against a
+# local stub); see configure().
+_credential_factory: Optional[Callable[[], Any]] = None
+_storage_client_factory: Optional[Callable[[Any, str], Any]] = None
+
+
+def configure(
+    credential_factory: Optional[Callable[[], Any]] = None,
+    storage_client_factory: Optional[Callable[[Any, str], Any]] = None,
+) -> None:
+    """
+    Replace how the credential and storage clients are built, and drop any
+    cached instances. Call with no arguments to go back to the Azure SDK.
+
+    Args:
+        credential_factory (Callable): () -> credential
+        storage_client_factory (Callable): (credential, subscription_id) -> client
+    """
+    global _credential_factory, _storage_client_factory
+    with _lock:
+        _credential_factory = credential_factory
+        _storage_client_factory = storage_client_factory
+    reset()
+
+
+def reset() -> None:
+    """Forget cached clients and the credential (they are rebuilt on next use)."""
+    global _credential, _transport
+    with _lock:
+        for client in _storage_clients.values():
+            close = getattr(client, "close", None)
+            if close is not None:
+                close()
+        _storage_clients.clear()
+        _credential = None
+        if _transport is not None:
+            _transport.session.close()
+        _transport = None
+
+
+def _get_transport():
+    """
+    One requests-based transport (and connection pool) shared by the
+    credential and every client, so token and management calls reuse
+    keep-alive connections instead of opening new TLS sessions.
+    """
+    global _transport
+    if _transport is None:
+        requests = lazy_import("requests")
+        adapters = lazy_import("requests.adapters")
+        transport_mod = lazy_import("azure.core.pipeline.transport")
+
+        session = requests.Session()
+        adapter = adapters.HTTPAdapter(pool_connections=4, pool_maxsize=AZURE_HTTP_POOL_SIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _transport = transport_mod.RequestsTransport(session=session, session_owner=False)
+    return _transport
+
+
+def get_credential():
+    """
+    Return the process-wide DefaultAzureCredential. Reusing it means the
+    credential chain is resolved once and access tokens are cached until
+    they are close to expiry.
+    """
+    global _credential
+    if _credential is None:
+        with _lock:
+            if _credential is None:
+                if _credential_factory is not None:
+                    _credential = _credential_factory()
+                else:
+                    identity = lazy_import("azure.identity")
+                    _credential = identity.DefaultAzureCredential(transport=_get_transport())
+    return _credential
+
+
+def get_storage_client(subscription_id: str):
+    """Return the shared StorageManagementClient for a subscription."""
+    client = _storage_clients.get(subscription_id)
+    if client is None:
+        credential = get_credential()
+        with _lock:
+            client = _storage_clients.get(subscription_id)
+            if client is None:
+                if _storage_client_factory is not None:
+                    client = _storage_client_factory(credential, subscription_id)
+                else:
+                    storage = lazy_import("azure.mgmt.storage")
+                    client = storage.StorageManagementClient(
+                        credential, subscription_id, transport=_get_transport()
+                    )
+                _storage_clients[subscription_id] = client
+    return client
@@ -0,0 +1,105 @@
+# In-process TTL cache with stale-while-revalidate for slow remote lookups.
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from . import metrics
+
+# Shared worker pool for cache loads, so refreshes never run on the event loop
+_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ttl-cache")
+
+
+@dataclass
+class _Entry:
+    value: Any
+    loaded_at: float
+
+
+class TTLCache:
+    """
+    Caches the result of `loader(key)` for `ttl` seconds.
+
+    After the TTL expires the entry is served stale for up to `stale_ttl`
+    more seconds while a single background refresh runs (stale-while-
+    revalidate). Only a cold or fully expired entry makes the caller wait,
+    and concurrent callers for the same key share one load (single flight).
+    If a background refresh fails, the stale value keeps being served until
+    the stale window ends.
+
+    Args:
+        name (str): Cache name used in the app_cache_requests_total metric
+        loader (Callable): Blocking function that fetches the value for a key
+        ttl (float): Seconds a value is considered fresh
+        stale_ttl (float): Extra seconds a value may be served while refreshing
+    """
+
+    def __init__(self, name: str, loader: Callable[[Hashable], Any],
+                 ttl: float, stale_ttl: float = 0.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, key: Hashable) -> Any:
+        try:
+            value = self.loader(key)
+            with self._lock:
+                self._entries[key] = _Entry(value, self._clock())
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _refresh(self, key: Hashable) -> Future:
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = _EXECUTOR.submit(self._load, key)
+                self._inflight[key] = future
+        return future
+
+    def _lookup(self, key: Hashable) -> Optional[Future]:
+        """Return None with the cached value available, or a Future to wait on."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = self._clock() - entry.loaded_at
+            if age < self.ttl:
+                metrics.record_cache(self.name, hit=True)
+                return None
+            if age < self.ttl + self.stale_ttl:
+                metrics.record_cache(self.name, hit=True, stale=True)
+                self._refresh(key)
+                return None
+
+        metrics.record_cache(self.name, hit=False)
+        return self._refresh(key)
+
+    def get(self, key: Hashable) -> Any:
+        """Blocking lookup (for sync callers)."""
+        future = self._lookup(key)
+        if future is None:
+            return self._entries[key].value
+        return future.result()
+
+    async def aget(self, key: Hashable) -> Any:
+        """Async lookup; a cache hit costs a dictionary lookup, misses are awaited off-loop."""
+        future = self._lookup(key)
+        if future is None:
+            return self._entries[key].value
+        return await asyncio.wrap_future(future)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one entry, or every entry when no key is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -0,0 +1,137 @@
+# Per-user one-time code stores with TTL expiry (in-memory or shared SQLite).
+import heapq
+import secrets
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Tuple
+
+# Results of CodeStore.check()
+OK = "ok"
+MISSING = "missing"
+EXPIRED = "expired"
+INVALID = "invalid"
+
+
+class MemoryCodeStore:
+    """
+    Process-local store: one pending code per user.
+
+    Expired codes are kept for `grace` seconds so verify can still answer
+    "expired" instead of "no code issued", and are then purged through a
+    min-heap ordered by purge time, so cleanup costs O(log n) per expired
+    entry instead of scanning the whole store.
+    """
+
+    def __init__(self, grace: float = 3600.0):
+        self.grace = grace
+        self._codes: Dict[str, Tuple[str, float]] = {}
+        self._heap: List[Tuple[float, str, float]] = []
+        self._lock = threading.Lock()
+
+    def _purge(self, now: float) -> None:
+        while self._heap and self._heap[0][0] <= now:
+            _, user, expires_at = heapq.heappop(self._heap)
+            entry = self._codes.get(user)
+            # Skip heap entries for codes that were since replaced
+            if entry is not None and entry[1] == expires_at:
+                del self._codes[user]
+
+    def put(self, user: str, code: str, ttl: float) -> None:
+        now = time.time()
+        expires_at = now + ttl
+        with self._lock:
+            self._purge(now)
+            self._codes[user] = (code, expires_at)
+            heapq.heappush(self._heap, (expires_at + self.grace, user, expires_at))
+
+    def check(self, user: str, code: str) -> str:
+        """Verify and consume a user's code. Returns OK, MISSING, EXPIRED or INVALID."""
+        now = time.time()
+        with self._lock:
+            self._purge(now)
+            entry = self._codes.get(user)
+            if entry is None:
+                return MISSING
+            stored, expires_at = entry
+            if now > expires_at:
+                return EXPIRED
+            if not secrets.compare_digest(code, stored):
+                return INVALID
+            del self._codes[user]
+            return OK
+
+
+class SQLiteCodeStore:
+    """
+    Store backed by a local SQLite file, so every worker process on the host
+    sees the same codes. Consuming a code is a single conditional DELETE,
+    which keeps verification atomic across workers (a code works once).
+    Expired rows are purged with an indexed range delete.
+    """
+
+    def __init__(self, path: str, grace: float = 3600.0):
+        self.path = path
+        self.grace = grace
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS twofa_codes ("
+                " user TEXT PRIMARY KEY, code TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS twofa_codes_expires ON twofa_codes (expires_at)"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def put(self, user: str, code: str, ttl: float) -> None:
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute("DELETE FROM twofa_codes WHERE expires_at < ?", (now - self.grace,))
+            conn.execute(
+                "INSERT OR REPLACE INTO twofa_codes (user, code, expires_at) VALUES (?, ?, ?)",
+                (user, code, now + ttl),
+            )
+
+    def check(self, user: str, code: str) -> str:
+        """Verify and consume a user's code. Returns OK, MISSING, EXPIRED or INVALID."""
+        now = time.time()
+        with self._conn() as conn:
+            cur = conn.execute(
+                "DELETE FROM twofa_codes WHERE user = ? AND code = ? AND expires_at >= ?",
+                (user, code, now),
+            )
+            if cur.rowcount == 1:
+                return OK
+
+            row = conn.execute(
+                "SELECT expires_at FROM twofa_codes WHERE user = ? AND expires_at >= ?",
+                (user, now - self.grace),
+            ).fetchone()
+            if row is None:
+                return MISSING
+            return EXPIRED if now > row[0] else INVALID
+
+
+def make_store(url: str, grace: float = 3600.0):
+    """
+    Build a code store from a URL:
+      - "memory"                    process-local (single worker)
+      - "sqlite:///path/to/file.db" shared between workers on one host
+
+    Raises:
+        ValueError: For an unsupported URL
+    """
+    if url == "memory":
+        return MemoryCodeStore(grace=grace)
+    if url.startswith("sqlite:///"):
+        return SQLiteCodeStore(url[len("sqlite:///"):], grace=grace)
+    raise ValueError(f"Unsupported 2FA store URL: {url}")
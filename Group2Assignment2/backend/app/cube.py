@@ -0,0 +1,196 @@
+# Precomputed diet x cuisine rollup cube of macronutrient statistics.
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .utils import NUM_COLS
+
+# Dimensions of the cube, in axis order
+DIMENSIONS = ["diet_type", "cuisine_type"]
+
+
+class MacroCube:
+    """
+    Count, sum and sum of squares of each macro per (diet, cuisine) cell,
+    plus the diet, cuisine and grand-total margins.
+
+    Everything is additive, so any slice or rollup is a sum over cells and
+    means/variances are derived from the summed stats in O(cells) without
+    touching the rows again.
+
+    Attributes:
+        diets, cuisines (list[str]): Labels of axis 0 and axis 1
+        count (np.ndarray): Row counts, shape (diets, cuisines)
+        sums, sumsq (np.ndarray): Per-macro sums and sums of squares,
+            shape (diets, cuisines, len(macros))
+    """
+
+    def __init__(self, diets: List[str], cuisines: List[str], count: np.ndarray,
+                 sums: np.ndarray, sumsq: np.ndarray, macros: Sequence[str] = NUM_COLS):
+        self.diets = list(diets)
+        self.cuisines = list(cuisines)
+        self.macros = list(macros)
+        self.count = count
+        self.sums = sums
+        self.sumsq = sumsq
+        self._diet_pos = {d: i for i, d in enumerate(self.diets)}
+        self._cuisine_pos = {c: i for i, c in enumerate(self.cuisines)}
+        self._rollup()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, macros: Sequence[str] = NUM_COLS) -> "MacroCube":
+        """
+        Build the cube with one vectorized bincount per statistic over the
+        flattened (diet code, cuisine code) cell index.
+        """
+        diet_codes, diets = pd.factorize(df["diet_type"], sort=True)
+        cuisine_codes, cuisines = pd.factorize(df["cuisine_type"], sort=True)
+        n_diets, n_cuisines = len(diets), len(cuisines)
+        n_cells = n_diets * n_cuisines
+
+        cell = diet_codes.astype(np.int64) * n_cuisines + cuisine_codes
+        count = np.bincount(cell, minlength=n_cells)
+
+        sums = np.empty((n_cells, len(macros)))
+        sumsq = np.empty((n_cells, len(macros)))
+        for j, macro in enumerate(macros):
+            values = df[macro].to_numpy(dtype=np.float64)
+            sums[:, j] = np.bincount(cell, weights=values, minlength=n_cells)
+            sumsq[:, j] = np.bincount(cell, weights=values * values, minlength=n_cells)
+
+        shape = (n_diets, n_cuisines)
+        return cls(
+            [str(d) for d in diets], [str(c) for c in cuisines],
+            count.reshape(shape),
+            sums.reshape(shape + (len(macros),)),
+            sumsq.reshape(shape + (len(macros),)),
+            macros,
+        )
+
+    def merge(self, other: "MacroCube") -> "MacroCube":
+        """
+        Return the cube of the union of both inputs (e.g. the loaded data
+        and newly appended rows). Costs O(cells); labels missing from one
+        side get empty cells.
+        """
+        diets = sorted(set(self.diets) | set(other.diets))
+        cuisines = sorted(set(self.cuisines) | set(other.cuisines))
+        shape = (len(diets), len(cuisines))
+        count = np.zeros(shape, dtype=np.int64)
+        sums = np.zeros(shape + (len(self.macros),))
+        sumsq = np.zeros(shape + (len(self.macros),))
+
+        d_pos = {d: i for i, d in enumerate(diets)}
+        c_pos = {c: i for i, c in enumerate(cuisines)}
+        for cube in (self, other):
+            cell = np.ix_([d_pos[d] for d in cube.diets], [c_pos[c] for c in cube.cuisines])
+            count[cell] += cube.count
+            sums[cell] += cube.sums
+            sumsq[cell] += cube.sumsq
+        return MacroCube(diets, cuisines, count, sums, sumsq, self.macros)
+
+    def _rollup(self) -> None:
+        """Recompute the marginal totals from the cells."""
+        self.diet_margin = (self.count.sum(axis=1), self.sums.sum(axis=1), self.sumsq.sum(axis=1))
+        self.cuisine_margin = (self.count.sum(axis=0), self.sums.sum(axis=0), self.sumsq.sum(axis=0))
+        self.total = (self.count.sum(), self.sums.sum(axis=(0, 1)), self.sumsq.sum(axis=(0, 1)))
+
+    def _positions(self, labels: Optional[Sequence[str]], lookup: Dict[str, int], size: int) -> np.ndarray:
+        if labels is None:
+            return np.arange(size)
+        # Unknown labels are dropped and repeats kept once, in request order
+        positions = dict.fromkeys(lookup[l] for l in labels if l in lookup)
+        return np.array(list(positions), dtype=np.int64)
+
+    def query(self, diets: Optional[Sequence[str]] = None,
+              cuisines: Optional[Sequence[str]] = None,
+              group_by: Sequence[str] = DIMENSIONS,
+              include_empty: bool = False) -> dict:
+        """
+        Slice/dice the cube and roll it up to the requested dimensions.
+
+        Args:
+            diets, cuisines (list[str] | None): Members to keep (None = all)
+            group_by (list[str]): Subset of DIMENSIONS to keep; the others
+                are summed out
+            include_empty (bool): Also return cells without any rows
+
+        Returns:
+            dict: {"group_by", "cells", "total"} where each cell holds the
+            dimension labels, the row count and per-macro sum/mean/var/std
+        """
+        di = self._positions(diets, self._diet_pos, len(self.diets))
+        ci = self._positions(cuisines, self._cuisine_pos, len(self.cuisines))
+
+        # Selections of every member in axis order use the precomputed margins
+        full = (np.array_equal(di, np.arange(len(self.diets)))
+                and np.array_equal(ci, np.arange(len(self.cuisines))))
+        count = self.count[np.ix_(di, ci)]
+        sums = self.sums[np.ix_(di, ci)]
+        sumsq = self.sumsq[np.ix_(di, ci)]
+
+        labels = {
+            "diet_type": [self.diets[i] for i in di],
+            "cuisine_type": [self.cuisines[i] for i in ci],
+        }
+        keep = [d for d in DIMENSIONS if d in group_by]
+
+        if keep == DIMENSIONS:
+            cell_stats = (count, sums, sumsq)
+            keys = [
+                {"diet_type": d, "cuisine_type": c}
+                for d in labels["diet_type"] for c in labels["cuisine_type"]
+            ]
+        elif keep == ["diet_type"]:
+            cell_stats = self.diet_margin if full else (count.sum(1), sums.sum(1), sumsq.sum(1))
+            keys = [{"diet_type": d} for d in labels["diet_type"]]
+        elif keep == ["cuisine_type"]:
+            cell_stats = self.cuisine_margin if full else (count.sum(0), sums.sum(0), sumsq.sum(0))
+            keys = [{"cuisine_type": c} for c in labels["cuisine_type"]]
+        else:
+            cell_stats, keys = None, []
+
+        cells = []
+        if cell_stats is not None:
+            n, s, ss = cell_stats
+            n = n.reshape(-1)
+            stats = self._stats(n, s.reshape(len(n), -1), ss.reshape(len(n), -1))
+            for key, rows, stat in zip(keys, n, stats):
+                if rows or include_empty:
+                    cells.append({**key, "count": int(rows), "stats": stat})
+
+        if full:
+            total_n, total_s, total_ss = self.total
+        else:
+            total_n, total_s, total_ss = count.sum(), sums.sum(axis=(0, 1)), sumsq.sum(axis=(0, 1))
+        total = {
+            "count": int(total_n),
+            "stats": self._stats(np.array([total_n]), total_s[None, :], total_ss[None, :])[0],
+        }
+        return {"group_by": keep, "cells": cells, "total": total}
+
+    def _stats(self, n: np.ndarray, s: np.ndarray, ss: np.ndarray) -> List[dict]:
+        """Sum, mean and sample variance/std per macro for each row of (n, s, ss)."""
+        n = n.astype(np.float64)[:, None]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(n > 0, s / n, np.nan)
+            # Clip tiny negative values left by floating-point cancellation
+            var = np.where(n > 1, np.maximum(ss - s * mean, 0.0) / (n - 1), np.nan)
+        std = np.sqrt(var)
+
+        def num(x: float) -> Optional[float]:
+            return None if np.isnan(x) else float(x)
+
+        return [
+            {
+                macro: {
+                    "sum": float(s[i, j]),
+                    "mean": num(mean[i, j]),
+                    "var": num(var[i, j]),
+                    "std": num(std[i, j]),
+                }
+                for j, macro in enumerate(self.macros)
+            }
+            for i in range(len(n))
+        ]
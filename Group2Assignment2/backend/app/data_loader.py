@@ -1,11 +1,166 @@
 # Loads and cashes the dataset from a CSV file.
+import itertools
+import threading
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from .utils import normalize_columns
+from typing import Any, Callable, Dict, NamedTuple, Optional
+from .utils import normalize_columns, NUM_COLS
+from .cube import MacroCube
+from .sketches import MacroSketches
+from . import metrics
+
+
+class Snapshot(NamedTuple):
+	"""The loaded dataset together with its derived indexes and version."""
+	df: pd.DataFrame
+	indexes: Dict[str, Any]
+	version: int
+
 
 # Global variable to cache the loaded dataset in memory
 # so that the CSV file is not re-read on every API request.
-_DATA: pd.DataFrame | None = None
+# Loads and appends replace the whole snapshot in a single assignment, so
+# a reader that takes the frame and an index from the same snapshot never
+# pairs rows with positions built for another frame.
+_SNAPSHOT: Optional[Snapshot] = None
+
+# Derived indexes (name -> builder) that are computed once, right after the
+# dataset is loaded, and cached next to it.
+INDEX_BUILDERS: Dict[str, Callable[[pd.DataFrame], Any]] = {}
+
+# Optional incremental updaters used by append_data(); an index without one
+# is rebuilt from the full frame after an append.
+INDEX_UPDATERS: Dict[str, Callable[[Any, pd.DataFrame, pd.DataFrame], Any]] = {}
+
+# Incremented whenever the in-memory dataset changes (load or append)
+_VERSIONS = itertools.count(1)
+
+# Serializes the first load and appends, so neither can overwrite the
+# snapshot the other just published (reentrant: appends load on demand)
+_LOCK = threading.RLock()
+
+# Columns every appended row must provide (after normalize_columns)
+REQUIRED_COLUMNS = ["diet_type", "recipe_name", "cuisine_type"] + NUM_COLS
+
+
+def register_index(name: str):
+	"""
+	Decorator that registers a function building a derived index from the
+	normalized DataFrame. Indexes are rebuilt whenever the dataset is loaded.
+	"""
+	def decorator(builder: Callable[[pd.DataFrame], Any]):
+		INDEX_BUILDERS[name] = builder
+		return builder
+	return decorator
+
+
+def register_index_update(name: str):
+	"""
+	Decorator that registers an incremental updater for an index:
+	updater(index, df, delta) returns the index for `df`, the combined
+	frame whose last len(delta) rows are the newly appended `delta`.
+	"""
+	def decorator(updater: Callable[[Any, pd.DataFrame, pd.DataFrame], Any]):
+		INDEX_UPDATERS[name] = updater
+		return updater
+	return decorator
+
+
+def dataset_version() -> int:
+	"""Version of the in-memory dataset (0 until it is first loaded)."""
+	snapshot = _SNAPSHOT
+	return 0 if snapshot is None else snapshot.version
+
+
+def get_index(name: str, csv_path: Path) -> Any:
+	"""
+	Return a derived index, loading the dataset first if needed.
+	Use get_snapshot() when the frame is needed as well.
+
+	Args:
+		name (str): Name the index was registered under
+		csv_path (Path): Path to the All_Diets.csv dataset
+
+	Returns:
+		Any: The cached index object
+	"""
+	return get_snapshot(csv_path).indexes[name]
+
+
+def build_indexes(df: pd.DataFrame) -> Dict[str, Any]:
+	"""Build every registered index for the given DataFrame."""
+	return {name: builder(df) for name, builder in INDEX_BUILDERS.items()}
+
+
+@register_index("protein_order")
+def _protein_order(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+	"""
+	Row positions sorted by protein (highest first) for the whole dataset
+	("all") and for each diet type, so /recipes/by_diet does not have to
+	filter and sort on every request.
+	"""
+	order = np.argsort(-df["protein_g"].to_numpy(), kind="stable")
+	diets = df["diet_type"].to_numpy()[order]
+
+	index = {"all": order}
+	for diet in pd.unique(diets):
+		index[diet] = order[diets == diet]
+	return index
+
+
+@register_index_update("protein_order")
+def _protein_order_update(index: Dict[str, np.ndarray], df: pd.DataFrame,
+                          delta: pd.DataFrame) -> Dict[str, np.ndarray]:
+	"""
+	Merge the appended rows into the sorted positions (binary search plus
+	one insert per diet) instead of sorting the whole column again.
+	"""
+	protein = df["protein_g"].to_numpy()
+	offset = len(df) - len(delta)
+	added = offset + np.argsort(-delta["protein_g"].to_numpy(), kind="stable")
+	diets = df["diet_type"].to_numpy()[added]
+
+	def merge(order: np.ndarray, new: np.ndarray) -> np.ndarray:
+		# New rows go after existing rows with equal protein, as in a stable sort
+		at = np.searchsorted(-protein[order], -protein[new], side="right")
+		return np.insert(order, at, new)
+
+	updated = dict(index)
+	updated["all"] = merge(index["all"], added)
+	for diet in pd.unique(diets):
+		new = added[diets == diet]
+		updated[diet] = merge(index[diet], new) if diet in index else new
+	return updated
+
+
+@register_index("macro_cube")
+def _macro_cube(df: pd.DataFrame) -> MacroCube:
+	"""
+	Diet x cuisine cube of macro counts, sums and sums of squares, so
+	/insights/cube answers slices and rollups without a groupby.
+	"""
+	return MacroCube.from_frame(df)
+
+
+@register_index_update("macro_cube")
+def _macro_cube_update(cube: MacroCube, df: pd.DataFrame, delta: pd.DataFrame) -> MacroCube:
+	return cube.merge(MacroCube.from_frame(delta))
+
+
+@register_index("macro_sketches")
+def _macro_sketches(df: pd.DataFrame) -> MacroSketches:
+	"""
+	Per-diet covariance and quantile sketches of the macros, used by
+	/insights/corr and /insights/distribution.
+	"""
+	return MacroSketches.from_frame(df)
+
+
+@register_index_update("macro_sketches")
+def _macro_sketches_update(sketches: MacroSketches, df: pd.DataFrame,
+                           delta: pd.DataFrame) -> MacroSketches:
+	return sketches.merge(MacroSketches.from_frame(delta))
 
 
 def load_data(csv_path: Path) -> pd.DataFrame:
@@ -19,19 +174,110 @@ def load_data(csv_path: Path) -> pd.DataFrame:
 	Returns:
 		pd.DataFrame: Cleaned and normalized DataFrame ready for analysis
 	"""
-	global _DATA
+	return get_snapshot(csv_path).df
+
+
+def get_snapshot(csv_path: Path) -> Snapshot:
+	"""
+	Return the current dataset snapshot, loading the CSV on first use.
+	Handlers that use the frame and an index together must take both from
+	one snapshot, since an append can replace it between two calls.
+
+	Args:
+		csv_path (Path): Path to the All_Diets.csv dataset
+
+	Returns:
+		Snapshot: The normalized DataFrame, its indexes and its version
+	"""
+	global _SNAPSHOT
 
 	# If the dataset is already loaded, return it from memory (cache)
-	if _DATA is not None:
-		return _DATA
+	snapshot = _SNAPSHOT
+	if snapshot is not None:
+		metrics.record_cache("dataset", hit=True)
+		return snapshot
+
+	with _LOCK:
+		# Another thread may have finished loading (or appended) meanwhile
+		snapshot = _SNAPSHOT
+		if snapshot is not None:
+			metrics.record_cache("dataset", hit=True)
+			return snapshot
+
+		metrics.record_cache("dataset", hit=False)
+
+		# Load the CSV file into a pandas DataFrame
+		df = pd.read_csv(csv_path)
+
+		# Normalize column names and handle missing values
+		df = normalize_columns(df)
+
+		# Cache the processed DataFrame and its derived indexes globally
+		snapshot = Snapshot(df, build_indexes(df), next(_VERSIONS))
+		_SNAPSHOT = snapshot
+
+		# Publish the size of the cached frame for the /metrics endpoint
+		metrics.DATASET_ROWS.set(len(df))
+		metrics.DATASET_BYTES.set(int(df.memory_usage(deep=True).sum()))
+		metrics.DATASET_VERSION.set(snapshot.version)
+
+		return snapshot
+
+
+def append_data(delta: pd.DataFrame, csv_path: Path) -> dict:
+	"""
+	Append new recipes to the in-memory dataset without re-reading the CSV.
+
+	Only the new rows go through normalize_columns; their missing macros
+	are filled with the dataset means, as a full reload would. Indexes with a
+	registered updater (protein order, macro cube, sketches) are updated
+	from the new rows alone; the others are rebuilt. The appended rows are
+	kept in memory only and are gone after a restart unless they are also
+	added to the CSV file.
+
+	Args:
+		delta (pd.DataFrame): New rows, with raw CSV or normalized headers
+		csv_path (Path): Path to the All_Diets.csv dataset
+
+	Returns:
+		dict: Number of rows appended, total rows and the new dataset version
+
+	Raises:
+		ValueError: If there are no rows or required columns are missing
+	"""
+	global _SNAPSHOT
+
+	with _LOCK:
+		current = get_snapshot(csv_path)
+		df = current.df
+
+		# Dataset means from the cube totals: O(cells), not a pass over df
+		cube = current.indexes["macro_cube"]
+		count, sums, _ = cube.total
+		delta = normalize_columns(delta, fill_values=pd.Series(sums / count, index=cube.macros))
+		missing = [c for c in REQUIRED_COLUMNS if c not in delta.columns]
+		if missing:
+			raise ValueError(f"Missing columns: {', '.join(missing)}")
+		if delta.empty:
+			raise ValueError("No rows to append")
+
+		delta = delta.reindex(columns=df.columns)
+		combined = pd.concat([df, delta], ignore_index=True)
+		delta = combined.iloc[len(df):]
 
-	# Load the CSV file into a pandas DataFrame
-	df = pd.read_csv(csv_path)
+		indexes = {}
+		for name, builder in INDEX_BUILDERS.items():
+			updater = INDEX_UPDATERS.get(name)
+			if updater is not None and name in current.indexes:
+				indexes[name] = updater(current.indexes[name], combined, delta)
+			else:
+				indexes[name] = builder(combined)
 
-	# Normalize column names and handle missing values
-	df = normalize_columns(df)
+		snapshot = Snapshot(combined, indexes, next(_VERSIONS))
+		_SNAPSHOT = snapshot
 
-	# Cache the processed DataFrame globally for future use
-	_DATA = df
+		metrics.DATASET_ROWS.set(len(combined))
+		metrics.DATASET_BYTES.inc(int(delta.memory_usage(deep=True, index=False).sum()))
+		metrics.DATASET_VERSION.set(snapshot.version)
 
-	return df
\ No newline at end of file
+		return {"appended": len(delta), "rows": len(combined), "version": snapshot.version}
\ No newline at end of file
@@ -0,0 +1,95 @@
+# Shared async HTTP client (keep-alive pool, timeouts, retries) for outbound API calls.
+import asyncio
+import os
+from typing import Any, Optional
+
+from .startup import lazy_import
+
+# -------------------------------------------------------------
+# Configuration (environment variables)
+# -------------------------------------------------------------
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", "2"))
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", "60"))
+
+# Response codes worth retrying for idempotent requests
+RETRY_STATUSES = {429, 502, 503, 504}
+
+_client = None
+
+# Optional transport override (e.g. httpx.MockTransport in tests); see configure()
+_transport: Optional[Any] = None
+
+
+def configure(transport: Optional[Any] = None) -> None:
+    """
+    Use a custom httpx transport for the shared client (None restores the
+    default pooled transport). The client is built with it on next use.
+
+    Raises:
+        RuntimeError: If the shared client is still open; close it first
+            with aclose() (the app lifespan does so on shutdown) so its
+            connection pool is not leaked
+    """
+    global _transport
+    if _client is not None and not _client.is_closed:
+        raise RuntimeError("Close the shared HTTP client with aclose() before reconfiguring it")
+    _transport = transport
+
+
+def get_client():
+    """
+    Return the process-wide httpx.AsyncClient, creating it on first use.
+    Normally it is created by the app lifespan and closed on shutdown.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        httpx = lazy_import("httpx")
+        transport = _transport
+        if transport is None:
+            # Connection-level retries only (connect errors / resets);
+            # HTTP-level retries are opt-in per call, see get_with_retry().
+            transport = httpx.AsyncHTTPTransport(
+                retries=HTTP_RETRIES,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+                ),
+            )
+        _client = httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        )
+    return _client
+
+
+async def aclose() -> None:
+    """Close the shared client and its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def get_with_retry(url: str, retries: int = HTTP_RETRIES, **kwargs):
+    """
+    GET with a small number of retries on 429/5xx and transport errors.
+    Only for idempotent requests: OAuth code exchanges must not be retried
+    because an authorization code can be redeemed once.
+    """
+    httpx = lazy_import("httpx")
+    client = get_client()
+
+    for attempt in range(retries + 1):
+        try:
+            res = await client.get(url, **kwargs)
+        except httpx.TransportError:
+            if attempt == retries:
+                raise
+        else:
+            if res.status_code not in RETRY_STATUSES or attempt == retries:
+                return res
+        await asyncio.sleep(0.1 * 2 ** attempt)
@@ -0,0 +1,174 @@
+# In-process background jobs for long-running operations (progress polling and SSE).
+import asyncio
+import json
+import secrets
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TERMINAL = (SUCCEEDED, FAILED)
+
+
+@dataclass
+class Job:
+    """State and progress history of one background job."""
+    id: str
+    kind: str
+    key: str
+    status: str = QUEUED
+    message: str = "Queued"
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    events: List[dict] = field(default_factory=list)
+    _changed: Optional[asyncio.Event] = field(default=None, repr=False)
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL
+
+    def _update(self, status: Optional[str] = None, message: Optional[str] = None) -> None:
+        if status is not None:
+            self.status = status
+        if message is not None:
+            self.message = message
+        self.updated_at = time.time()
+        self.events.append({
+            "status": self.status,
+            "message": self.message,
+            "at": self.updated_at,
+        })
+        # Wake everyone streaming this job, then arm a new event
+        if self._changed is not None:
+            self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_for_change(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the job changes; returns False on timeout."""
+        changed = self._changed
+        if changed is None:
+            changed = self._changed = asyncio.Event()
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class JobManager:
+    """
+    Runs jobs as asyncio tasks on the server's event loop.
+
+    Submitting a job whose `key` matches a job that is still queued or
+    running returns that job instead of starting a new one, so concurrent
+    duplicate requests share the same work. Finished jobs are kept for
+    `retention` seconds (and at most `max_jobs`) so clients can read the
+    outcome.
+    """
+
+    def __init__(self, retention: float = 3600.0, max_jobs: int = 200):
+        self.retention = retention
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._active: Dict[str, str] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def submit(self, kind: str, key: str,
+               work: Callable[[Callable[[str], None]], Awaitable[Any]]) -> Tuple[Job, bool]:
+        """
+        Start `work(progress)` in the background unless an identical job is active.
+        Must be called from the event loop.
+
+        Args:
+            kind (str): Job type, e.g. "cloud_cleanup"
+            key (str): Deduplication key
+            work (Callable): Coroutine function receiving a progress(message) callback
+
+        Returns:
+            tuple: (job, created) where created is False for a deduplicated request
+        """
+        active_id = self._active.get(key)
+        if active_id is not None:
+            job = self._jobs.get(active_id)
+            if job is not None and not job.done:
+                return job, False
+
+        self._evict()
+        job = Job(id=secrets.token_hex(8), kind=kind, key=key)
+        job._update()
+        self._jobs[job.id] = job
+        self._active[key] = job.id
+        self._tasks[job.id] = asyncio.get_running_loop().create_task(self._run(job, work))
+        return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def _run(self, job: Job, work) -> None:
+        job._update(RUNNING, "Started")
+        try:
+            job.result = await work(lambda message: job._update(message=message))
+            job._update(SUCCEEDED, "Completed")
+        except asyncio.CancelledError:
+            job.error = "cancelled"
+            job._update(FAILED, "Cancelled")
+            raise
+        except Exception as exc:
+            job.error = str(exc)
+            job._update(FAILED, "Failed")
+        finally:
+            if self._active.get(job.key) == job.id:
+                del self._active[job.key]
+            self._tasks.pop(job.id, None)
+
+    def _evict(self) -> None:
+        cutoff = time.time() - self.retention
+        for job_id in [j.id for j in self._jobs.values() if j.done and j.updated_at < cutoff]:
+            del self._jobs[job_id]
+        while len(self._jobs) >= self.max_jobs:
+            oldest = next((j.id for j in self._jobs.values() if j.done), None)
+            if oldest is None:
+                break
+            del self._jobs[oldest]
+
+    async def shutdown(self) -> None:
+        """Cancel jobs that are still running (called on app shutdown)."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def stream(self, job: Job, heartbeat: float = 15.0):
+        """
+        Yield Server-Sent Events for a job: every progress event, then a
+        final "end" event with the job summary. Comment lines are sent as
+        heartbeats so proxies keep the connection open.
+        """
+        sent = 0
+        while True:
+            while sent < len(job.events):
+                yield f"event: progress\ndata: {json.dumps(job.events[sent])}\n\n"
+                sent += 1
+            if job.done:
+                yield f"event: end\ndata: {json.dumps(job.summary(), default=str)}\n\n"
+                return
+            if not await job.wait_for_change(timeout=heartbeat):
+                yield ": keep-alive\n\n"
@@ -0,0 +1,215 @@
+# Background email delivery over a persistent SMTP connection.
+import itertools
+import logging
+import queue
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from . import metrics
+from .startup import lazy_import
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+@dataclass
+class Ticket:
+    """Delivery status of one queued message."""
+    id: str
+    status: str = "queued"  # queued | sent | failed
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def summary(self) -> dict:
+        return {"ticket": self.id, "status": self.status, "error": self.error}
+
+
+class SMTPDeliveryQueue:
+    """
+    Sends email from a single background thread.
+
+    Callers enqueue a message and get a ticket id back immediately. The
+    worker keeps one SMTP connection open (STARTTLS and login happen once,
+    not per message), drains up to `batch_size` queued messages per wake-up,
+    reconnects once if the server dropped the connection, and closes it
+    after `idle_timeout` seconds without mail.
+
+    Args:
+        host (str), port (int): SMTP server
+        user (str), password (str): Login credentials (skipped when unset,
+            e.g. for a local debugging server)
+        starttls (bool): Upgrade the connection with STARTTLS
+        batch_size (int): Maximum messages sent per wake-up
+        idle_timeout (float): Seconds before an idle connection is closed
+        max_queue (int): Maximum queued messages before submit() fails
+    """
+
+    def __init__(self, host: str, port: int, user: Optional[str] = None,
+                 password: Optional[str] = None, starttls: bool = True,
+                 batch_size: int = 50, idle_timeout: float = 30.0,
+                 max_queue: int = 1000, max_tickets: int = 1000,
+                 timeout: float = 15.0):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.batch_size = batch_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.max_tickets = max_tickets
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._tickets: "OrderedDict[str, Ticket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._conn = None
+        self._seq = itertools.count()
+
+    # --- Public API ----------------------------------------------------------
+
+    def submit(self, msg) -> str:
+        """
+        Queue an email.message.EmailMessage for delivery.
+
+        Returns:
+            str: Ticket id to poll with status()
+
+        Raises:
+            RuntimeError: If the delivery queue is full
+        """
+        self._ensure_worker()
+        ticket = Ticket(id=secrets.token_hex(8))
+        with self._lock:
+            self._tickets[ticket.id] = ticket
+            while len(self._tickets) > self.max_tickets:
+                self._tickets.popitem(last=False)
+        try:
+            self._queue.put_nowait((ticket, msg))
+        except queue.Full:
+            self._finish(ticket, "failed", "delivery queue is full")
+            raise RuntimeError("Email delivery queue is full")
+        return ticket.id
+
+    def status(self, ticket_id: str) -> Optional[dict]:
+        ticket = self._tickets.get(ticket_id)
+        return None if ticket is None else ticket.summary()
+
+    def wait(self, ticket_id: str, timeout: Optional[float] = None) -> Optional[dict]:
+        """Block until a ticket is delivered or failed (or `timeout` passes)."""
+        ticket = self._tickets.get(ticket_id)
+        if ticket is None:
+            return None
+        ticket.done.wait(timeout)
+        return ticket.summary()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush queued mail, close the connection and stop the worker."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        self._thread = None
+
+    # --- Worker --------------------------------------------------------------
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name=f"smtp-delivery-{next(self._seq)}", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                self._close()
+                continue
+            if item is _STOP:
+                break
+
+            batch = [item]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    nxt = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stop = True
+                    break
+                batch.append(nxt)
+
+            self._send_batch(batch)
+            if stop:
+                break
+        self._close()
+
+    def _connect(self):
+        smtplib = lazy_import("smtplib")
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            conn.starttls()
+        if self.user and self.password:
+            conn.login(self.user, self.password)
+        return conn
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.quit()
+            except Exception:
+                pass
+            self._conn = None
+
+    def _send_batch(self, batch) -> None:
+        smtplib = lazy_import("smtplib")
+        for ticket, msg in batch:
+            for attempt in range(2):
+                try:
+                    if self._conn is None:
+                        self._conn = self._connect()
+                    self._conn.send_message(msg)
+                    self._finish(ticket, "sent")
+                    break
+                except smtplib.SMTPServerDisconnected as exc:
+                    # Connection went stale; reconnect once before giving up
+                    self._conn = None
+                    if attempt == 1:
+                        self._finish(ticket, "failed", str(exc))
+                except smtplib.SMTPException as exc:
+                    # Rejected by the server (auth, recipient, ...): not retried
+                    self._close()
+                    self._finish(ticket, "failed", str(exc))
+                    break
+                except OSError as exc:
+                    # Network error (SMTPException is also an OSError, so it goes last)
+                    self._conn = None
+                    if attempt == 1:
+                        self._finish(ticket, "failed", str(exc))
+                except Exception as exc:
+                    # Anything else (e.g. a malformed message): fail this
+                    # ticket, drop the connection and keep the worker alive
+                    self._close()
+                    self._finish(ticket, "failed", f"{type(exc).__name__}: {exc}")
+                    break
+
+    def _finish(self, ticket: Ticket, status: str, error: Optional[str] = None) -> None:
+        ticket.status = status
+        ticket.error = error
+        ticket.done.set()
+        metrics.EMAIL_DELIVERIES.inc(result=status)
+        if error:
+            logger.warning("email delivery %s failed: %s", ticket.id, error)
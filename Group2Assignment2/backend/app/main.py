@@ -1,35 +1,61 @@
 # Defines all API routes for insights, recipes, and clustering.
-from http.client import HTTPException
-from fastapi import FastAPI, Query # type: ignore
+import time
+_IMPORT_START = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, Query, Request # type: ignore
+from fastapi.concurrency import run_in_threadpool # type: ignore
 from fastapi.middleware.cors import CORSMiddleware # type: ignore
+from fastapi.responses import PlainTextResponse, StreamingResponse # type: ignore
 from pathlib import Path
-import pandas as pd # type: ignore
-from sklearn.cluster import KMeans # type: ignore
-from .data_loader import load_data
+from .data_loader import load_data, get_index, get_snapshot, append_data
 from .utils import filter_by_diet, NUM_COLS
+from . import azure_clients, code_store, http_client, jobs, metrics, profiling, startup
+from .cache import TTLCache
+from .mailer import SMTPDeliveryQueue
+from .metrics import MetricsMiddleware, stage_timer
+from .startup import lazy_import
 from .models import (
-    AvgResponse, AvgInsight,
+    AvgResponse, AvgInsight, CubeResponse,
+    CorrelationResponse, DistributionResponse,
     Recipe, TopProteinResponse,
     ClusterResponse, ClusterPoint
 )
-from .azure_cleanup import cleanup_resource_group
 from pydantic import BaseModel # type: ignore
-from typing import Literal
+from typing import Literal, Optional
+import io
+import json
 import os
-import requests # type: ignore
 from fastapi import HTTPException # type: ignore
-import time
+import pandas as pd # type: ignore
 import secrets
-import smtplib
-from email.message import EmailMessage
-from azure.identity import DefaultAzureCredential
-from azure.mgmt.storage import StorageManagementClient
+
+# Heavy SDKs (scikit-learn, Azure, requests, smtplib) are imported on first
+# use through lazy_import() so that workers start quickly; see startup.py.
 
 # Path to the CSV dataset (shared across all API endpoints)
 CSV_PATH = Path(__file__).resolve().parents[2] / "data" / "All_Diets.csv"
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Preloads the dataset and derived indexes (and any PRELOAD_MODULES)
+    before the worker starts accepting requests.
+    """
+    startup.preload(lambda: load_data(CSV_PATH))
+    # Pooled outbound HTTP client shared by the OAuth callbacks
+    http_client.get_client()
+    yield
+    # Cancel background jobs, then flush queued 2FA emails; the mailer's
+    # join runs in a thread so it does not block the event loop
+    await JOBS.shutdown()
+    await run_in_threadpool(TWOFA_MAILER.stop)
+    await http_client.aclose()
+
+
 # Initialize the FastAPI application
-app = FastAPI(title="Nutritional Insights API")
+app = FastAPI(title="Nutritional Insights API", lifespan=lifespan)
 
 # Enable CORS so the React frontend can access the backend from any origin
 app.add_middleware(
@@ -40,6 +66,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record per-route latency and in-flight requests for /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Opt-in per-request profiling (PROFILING_ENABLED); no-op when disabled.
+# Installed before the routes below so they use its route class.
+profiling.install(app)
+
 
 # -------------------------------------------------------------
 # Health check endpoint
@@ -53,6 +86,19 @@ async def health():
     return {"status": "ok"}
 
 
+# -------------------------------------------------------------
+# Prometheus metrics endpoint
+# -------------------------------------------------------------
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """
+    Exposes request latency histograms, per-stage handler timings,
+    in-flight request gauges, cache hit/miss counters and dataset size
+    in Prometheus text format.
+    """
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 # -------------------------------------------------------------
 # Average macronutrients by diet type
 # -------------------------------------------------------------
@@ -68,49 +114,215 @@ async def avg_insights(diet: str = Query("all")):
     Returns:
         AvgResponse: List of average macronutrient values
     """
-    df = load_data(CSV_PATH)
-    dfq = filter_by_diet(df, diet)
+    with stage_timer("load"):
+        df = load_data(CSV_PATH)
+    with stage_timer("filter"):
+        dfq = filter_by_diet(df, diet)
 
     # Group by diet type and calculate the mean of each nutrient
-    avg = dfq.groupby("diet_type")[NUM_COLS].mean().reset_index()
+    with stage_timer("groupby"):
+        avg = dfq.groupby("diet_type")[NUM_COLS].mean().reset_index()
 
     # Convert each row to a Pydantic model instance
-    items = [
-        AvgInsight(
-            diet_type=row["diet_type"],
-            avg_protein_g=float(row["protein_g"]),
-            avg_carbs_g=float(row["carbs_g"]),
-            avg_fat_g=float(row["fat_g"]),
-        )
-        for _, row in avg.iterrows()
-    ]
+    with stage_timer("serialize"):
+        items = [
+            AvgInsight(
+                diet_type=row["diet_type"],
+                avg_protein_g=float(row["protein_g"]),
+                avg_carbs_g=float(row["carbs_g"]),
+                avg_fat_g=float(row["fat_g"]),
+            )
+            for _, row in avg.iterrows()
+        ]
 
     return {"items": items}
 
 
 # -------------------------------------------------------------
-# Top N protein-rich recipes (by diet)
+# Diet x cuisine macronutrient cube (slice / dice / rollup)
 # -------------------------------------------------------------
-@app.get("/recipes/by_diet")
-def recipes_by_diet(diet: str = "all"):
-    df = load_data(CSV_PATH)
+CUBE_DIMENSIONS = {
+    "diet": "diet_type", "diet_type": "diet_type",
+    "cuisine": "cuisine_type", "cuisine_type": "cuisine_type",
+}
+
+
+def _cube_members(value: str) -> Optional[list[str]]:
+    """Parse a comma-separated member filter; None selects every member."""
+    members = [v.strip().lower() for v in value.split(",") if v.strip()]
+    if not members or "all" in members:
+        return None
+    return members
+
+
+@app.get("/insights/cube", response_model=CubeResponse)
+async def insights_cube(
+    diet: str = Query("all"),
+    cuisine: str = Query("all"),
+    group_by: str = Query("diet_type,cuisine_type"),
+    include_empty: bool = Query(False),
+):
+    """
+    Returns count, sum, mean, variance and standard deviation of each
+    macronutrient per (diet, cuisine) cell, served from the cube that is
+    precomputed when the dataset loads.
+
+    Args:
+        diet (str): Comma-separated diets to keep (default = "all")
+        cuisine (str): Comma-separated cuisines to keep (default = "all")
+        group_by (str): Dimensions to keep: "diet_type,cuisine_type",
+            "diet_type", "cuisine_type" or "none" for the slice total only
+        include_empty (bool): Also return cells without recipes
+
+    Returns:
+        CubeResponse: Cells at the requested grouping and the slice total
+    """
+    keep = []
+    for name in group_by.split(","):
+        name = name.strip().lower()
+        if not name or name == "none":
+            continue
+        if name not in CUBE_DIMENSIONS:
+            raise HTTPException(status_code=400, detail=f"Unknown cube dimension: {name}")
+        keep.append(CUBE_DIMENSIONS[name])
+
+    with stage_timer("load"):
+        cube = get_index("macro_cube", CSV_PATH)
+
+    with stage_timer("rollup"):
+        return cube.query(
+            diets=_cube_members(diet),
+            cuisines=_cube_members(cuisine),
+            group_by=keep,
+            include_empty=include_empty,
+        )
+
+
+# -------------------------------------------------------------
+# Macro correlations and distributions (per-diet sketches)
+# -------------------------------------------------------------
+def _diet_sketch(diet: str) -> dict:
+    """Sketches of one diet ("all" for every recipe); 404 for an unknown diet."""
+    sketches = get_index("macro_sketches", CSV_PATH)
+    key = diet.strip().lower() or "all"
+    entry = sketches.get(key)
+    if entry is None or entry["moments"].n == 0:
+        raise HTTPException(status_code=404, detail=f"No recipes for diet: {diet}")
+    return entry
 
-    if diet != "all":
-        df = df[df["diet_type"].str.lower() == diet.lower()]
 
-    df = df.sort_values("protein_g", ascending=False)
+def _num(x) -> Optional[float]:
+    x = float(x)
+    return None if x != x else x
 
-    recipes = [
-        {
-            "diet_type": row["diet_type"],
-            "recipe_name": row["recipe_name"],
-            "cuisine_type": row["cuisine_type"],
-            "protein_g": float(row["protein_g"]),
-            "carbs_g": float(row["carbs_g"]),
-            "fat_g": float(row["fat_g"]),
+
+@app.get("/insights/corr", response_model=CorrelationResponse)
+async def insights_corr(diet: str = Query("all")):
+    """
+    Returns the covariance and Pearson correlation matrices of the
+    macronutrients for a diet, from the moment sketch built at load time.
+
+    Args:
+        diet (str): Diet type or "all" (default = "all")
+
+    Returns:
+        CorrelationResponse: Means, covariance and correlation of NUM_COLS
+    """
+    with stage_timer("load"):
+        moments = _diet_sketch(diet)["moments"]
+
+    with stage_timer("serialize"):
+        return {
+            "diet_type": diet.strip().lower() or "all",
+            "count": moments.n,
+            "macros": NUM_COLS,
+            "means": dict(zip(NUM_COLS, map(float, moments.mean))),
+            "covariance": [[_num(v) for v in row] for row in moments.covariance()],
+            "correlation": [[_num(v) for v in row] for row in moments.correlation()],
         }
-        for _, row in df.iterrows()
-    ]
+
+
+@app.get("/insights/distribution", response_model=DistributionResponse)
+async def insights_distribution(
+    diet: str = Query("all"),
+    macro: str = Query("protein_g"),
+    q: str = Query("0.05,0.25,0.5,0.75,0.95"),
+    bins: int = Query(20, ge=1, le=200),
+):
+    """
+    Returns approximate quantiles and a histogram of one macronutrient for
+    a diet, from the histogram sketch built at load time.
+
+    Args:
+        diet (str): Diet type or "all" (default = "all")
+        macro (str): One of protein_g, carbs_g, fat_g ("protein" etc. also accepted)
+        q (str): Comma-separated probabilities in [0, 1]
+        bins (int): Number of histogram bins between min and max
+
+    Returns:
+        DistributionResponse: Summary statistics, quantiles and histogram
+    """
+    name = macro.strip().lower()
+    if name not in NUM_COLS:
+        name = f"{name}_g"
+    if name not in NUM_COLS:
+        raise HTTPException(status_code=400, detail=f"Unknown macro: {macro}")
+    try:
+        probs = [float(p) for p in q.split(",") if p.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="q must be comma-separated numbers")
+    if any(not 0.0 <= p <= 1.0 for p in probs):
+        raise HTTPException(status_code=400, detail="q values must be between 0 and 1")
+
+    with stage_timer("load"):
+        entry = _diet_sketch(diet)
+
+    with stage_timer("quantiles"):
+        moments = entry["moments"]
+        hist = entry["hist"][name]
+        j = NUM_COLS.index(name)
+        return {
+            "diet_type": diet.strip().lower() or "all",
+            "macro": name,
+            "count": hist.n,
+            "min": hist.min,
+            "max": hist.max,
+            "mean": float(moments.mean[j]),
+            "std": _num(moments.covariance()[j, j] ** 0.5),
+            "quantiles": {f"{p:g}": v for p, v in zip(probs, hist.quantiles(probs))},
+            "histogram": hist.histogram(bins),
+        }
+
+
+# -------------------------------------------------------------
+# Top N protein-rich recipes (by diet)
+# -------------------------------------------------------------
+@app.get("/recipes/by_diet")
+def recipes_by_diet(diet: str = "all"):
+    # Frame and index come from one snapshot, so an append cannot split them
+    with stage_timer("load"):
+        snapshot = get_snapshot(CSV_PATH)
+        df = snapshot.df
+        protein_order = snapshot.indexes["protein_order"]
+
+    # Rows of the selected diet, already sorted by protein (highest first)
+    with stage_timer("filter"):
+        key = "all" if diet == "all" else diet.lower()
+        positions = protein_order.get(key, protein_order["all"][:0])
+        df = df.iloc[positions]
+
+    with stage_timer("serialize"):
+        recipes = [
+            {
+                "diet_type": row["diet_type"],
+                "recipe_name": row["recipe_name"],
+                "cuisine_type": row["cuisine_type"],
+                "protein_g": float(row["protein_g"]),
+                "carbs_g": float(row["carbs_g"]),
+                "fat_g": float(row["fat_g"]),
+            }
+            for _, row in df.iterrows()
+        ]
 
     return {"recipes": recipes}
 
@@ -131,28 +343,89 @@ async def clusters(k: int = Query(4, ge=2, le=10), diet: str = Query("all")):
     Returns:
         ClusterResponse: List of data points (carbs vs protein) with cluster labels
     """
-    df = load_data(CSV_PATH)
-    dfq = filter_by_diet(df, diet)
+    with stage_timer("load"):
+        df = load_data(CSV_PATH)
+    with stage_timer("filter"):
+        dfq = filter_by_diet(df, diet)
 
     # Prepare numerical data for clustering
     X = dfq[NUM_COLS].to_numpy()
 
     # Fit K-Means model to the data
-    model = KMeans(n_clusters=k, n_init=10, random_state=42)
-    labels = model.fit_predict(X)
+    KMeans = lazy_import("sklearn.cluster").KMeans
+    with stage_timer("kmeans_fit"):
+        model = KMeans(n_clusters=k, n_init=10, random_state=42)
+        labels = model.fit_predict(X)
 
     # Build response list of ClusterPoint objects
-    points = [
-        ClusterPoint(
-            x=float(row["carbs_g"]),
-            y=float(row["protein_g"]),
-            label=int(lbl)
-        )
-        for (_, row), lbl in zip(dfq.iterrows(), labels)
-    ]
+    with stage_timer("serialize"):
+        points = [
+            ClusterPoint(
+                x=float(row["carbs_g"]),
+                y=float(row["protein_g"]),
+                label=int(lbl)
+            )
+            for (_, row), lbl in zip(dfq.iterrows(), labels)
+        ]
 
     return {"points": points}
 
+# -------------------------------------------------------------
+# Incremental ingestion of new recipes
+# -------------------------------------------------------------
+# Token required in X-Ingest-Token to append data; appends are refused
+# while it is unset, so the write endpoint is off by default
+INGEST_TOKEN = os.environ.get("INGEST_TOKEN")
+
+
+def _parse_delta(body: bytes, content_type: str) -> pd.DataFrame:
+    """Parse appended rows from a CSV body or a JSON list of records."""
+    if "json" in content_type:
+        records = json.loads(body)
+        if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+            raise ValueError("Expected a JSON list of records (objects)")
+        return pd.DataFrame.from_records(records)
+    return pd.read_csv(io.BytesIO(body))
+
+
+@app.get("/dataset")
+async def dataset_info():
+    """
+    Returns the current dataset version (incremented on every load or
+    append) and the number of rows held in memory.
+    """
+    snapshot = get_snapshot(CSV_PATH)
+    return {"version": snapshot.version, "rows": len(snapshot.df)}
+
+
+@app.post("/ingest/append")
+async def ingest_append(request: Request, x_ingest_token: Optional[str] = Header(None)):
+    """
+    Appends new recipes to the in-memory dataset without reloading the CSV.
+    The body is either CSV with the All_Diets.csv headers or a JSON list of
+    records; only the new rows are normalized, and the protein order, cube
+    and sketches are updated from them alone.
+
+    Returns:
+        dict: Rows appended, total rows and the new dataset version
+    """
+    if not INGEST_TOKEN:
+        raise HTTPException(status_code=403, detail="Ingestion is disabled (INGEST_TOKEN is not set)")
+    if not (x_ingest_token and secrets.compare_digest(x_ingest_token, INGEST_TOKEN)):
+        raise HTTPException(status_code=403, detail="Invalid ingest token")
+
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    try:
+        delta = await run_in_threadpool(_parse_delta, body, content_type)
+        with stage_timer("append"):
+            result = await run_in_threadpool(append_data, delta, CSV_PATH)
+    except (ValueError, pd.errors.ParserError) as exc:
+        # EmptyDataError and JSON decode errors are ValueErrors too
+        raise HTTPException(status_code=400, detail=f"Invalid rows: {exc}")
+
+    return {"status": "ok", **result}
+
 # -------------------------------------------------------------
 # Security status endpoint
 # -------------------------------------------------------------
@@ -164,21 +437,53 @@ class SecurityStatus(BaseModel):
     issues: list[str] = []
 
 
-@app.get("/security/status", response_model=SecurityStatus)
-def get_security_status():
-    credential = DefaultAzureCredential()
-    subscription_id = os.environ["AZURE_SUBSCRIPTION_ID"]
-    resource_group = os.environ["AZURE_RESOURCE_GROUP"]
-    account_name = os.environ["AZURE_STORAGE_ACCOUNT"]
+# How long a storage-account lookup is fresh, and how long it may be served
+# stale while a background refresh runs (seconds)
+SECURITY_STATUS_TTL = float(os.environ.get("SECURITY_STATUS_TTL", "60"))
+SECURITY_STATUS_STALE_TTL = float(os.environ.get("SECURITY_STATUS_STALE_TTL", "600"))
 
-    storage_client = StorageManagementClient(credential, subscription_id)
+
+def fetch_blob_encryption(key: tuple[str, str, str]) -> bool:
+    """
+    Reads the storage account properties through the shared management
+    client and returns whether blob encryption is enabled.
+
+    Args:
+        key (tuple): (subscription_id, resource_group, account_name)
+    """
+    subscription_id, resource_group, account_name = key
+    storage_client = azure_clients.get_storage_client(subscription_id)
 
     account = storage_client.storage_accounts.get_properties(
         resource_group_name=resource_group,
         account_name=account_name
     )
 
-    encryption_enabled = account.encryption.services.blob.enabled
+    return bool(account.encryption.services.blob.enabled)
+
+
+SECURITY_STATUS_CACHE = TTLCache(
+    "security_status",
+    fetch_blob_encryption,
+    ttl=SECURITY_STATUS_TTL,
+    stale_ttl=SECURITY_STATUS_STALE_TTL,
+)
+
+
+@app.get("/security/status", response_model=SecurityStatus)
+async def get_security_status():
+    """
+    Reports the storage account's encryption status. The Azure lookup is
+    cached (see SECURITY_STATUS_TTL) and always runs off the event loop, so
+    dashboard polling is normally served from memory.
+    """
+    subscription_id = os.environ["AZURE_SUBSCRIPTION_ID"]
+    resource_group = os.environ["AZURE_RESOURCE_GROUP"]
+    account_name = os.environ["AZURE_STORAGE_ACCOUNT"]
+
+    encryption_enabled = await SECURITY_STATUS_CACHE.aget(
+        (subscription_id, resource_group, account_name)
+    )
 
     return SecurityStatus(
         security_status="Secure" if encryption_enabled else "Warning",
@@ -192,17 +497,58 @@ def get_security_status():
 # -------------------------------------------------------------
 # Cloud resource cleanup endpoint
 # -------------------------------------------------------------
-@app.post("/cloud/cleanup")
+# Background jobs (cleanup can take minutes, far beyond proxy timeouts)
+JOBS = jobs.JobManager()
+
+
+@app.post("/cloud/cleanup", status_code=202)
 async def cloud_cleanup():
     """
-    Cleans up cloud resources by deleting the specified resource group.
+    Starts deleting the configured resource group as a background job and
+    returns immediately. Progress is available from /jobs/{id} or as a
+    Server-Sent Events stream from /jobs/{id}/events. Repeated requests
+    while a deletion is running return the same job.
     """
+    azure_cleanup = lazy_import(f"{__package__}.azure_cleanup")
     try:
-        result = cleanup_resource_group()
-        return {"status": "ok", "result": result}
+        subscription_id, resource_group = azure_cleanup.get_cleanup_settings()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    job, created = JOBS.submit(
+        "cloud_cleanup",
+        f"cloud_cleanup:{subscription_id}/{resource_group}",
+        lambda progress: azure_cleanup.cleanup_resource_group_async(progress),
+    )
+    return {"status": "accepted", "deduplicated": not created, "job": job.summary()}
+
+
+# -------------------------------------------------------------
+# Background job status endpoints
+# -------------------------------------------------------------
+def _get_job(job_id: str) -> jobs.Job:
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Returns the current status, last progress message and result of a job."""
+    return _get_job(job_id).summary()
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job(job_id: str):
+    """Streams a job's progress as Server-Sent Events until it finishes."""
+    job = _get_job(job_id)
+    return StreamingResponse(
+        JOBS.stream(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # -------------------------------------------------------------
 # GitHub OAuth callback endpoint
 # -------------------------------------------------------------
@@ -210,39 +556,57 @@ async def cloud_cleanup():
 GITHUB_CLIENT_ID = os.environ.get("GITHUB_CLIENT_ID")
 GITHUB_CLIENT_SECRET = os.environ.get("GITHUB_CLIENT_SECRET")
 
+# Redirect URI registered with both OAuth providers
+OAUTH_REDIRECT_URI = os.environ.get("OAUTH_REDIRECT_URI", "http://localhost:5173")
+
+# Provider endpoints (overridable to point at a local fake OAuth server)
+GITHUB_TOKEN_URL = os.environ.get("GITHUB_TOKEN_URL", "https://github.com/login/oauth/access_token")
+GITHUB_USER_URL = os.environ.get("GITHUB_USER_URL", "https://api.github.com/user")
+
 
 @app.get("/auth/github/callback")
-def github_callback(code: str):
+async def github_callback(code: str):
+    """
+    Exchanges a GitHub authorization code for an access token and returns
+    the user's profile. Both calls go through the shared, pooled async
+    client; they are sequential because the second needs the token.
+    """
     if not GITHUB_CLIENT_ID or not GITHUB_CLIENT_SECRET:
         raise HTTPException(status_code=500, detail="GitHub OAuth is not configured.")
 
-    # 1) code -> access_token exchange
-    token_res = requests.post(
-        "https://github.com/login/oauth/access_token",
-        headers={"Accept": "application/json"},
-        data={
-            "client_id": GITHUB_CLIENT_ID,
-            "client_secret": GITHUB_CLIENT_SECRET,
-            "code": code,
-            "redirect_uri": "http://localhost:5173",
-        },
-    )
+    httpx = lazy_import("httpx")
+    client = http_client.get_client()
+
+    try:
+        # 1) code -> access_token exchange (never retried: codes are single-use)
+        token_res = await client.post(
+            GITHUB_TOKEN_URL,
+            headers={"Accept": "application/json"},
+            data={
+                "client_id": GITHUB_CLIENT_ID,
+                "client_secret": GITHUB_CLIENT_SECRET,
+                "code": code,
+                "redirect_uri": OAUTH_REDIRECT_URI,
+            },
+        )
 
-    if not token_res.ok:
-        raise HTTPException(status_code=500, detail="Failed to exchange GitHub code")
+        if not token_res.is_success:
+            raise HTTPException(status_code=500, detail="Failed to exchange GitHub code")
 
-    token_data = token_res.json()
-    access_token = token_data.get("access_token")
-    if not access_token:
-        raise HTTPException(status_code=500, detail=f"GitHub token error: {token_data}")
+        token_data = token_res.json()
+        access_token = token_data.get("access_token")
+        if not access_token:
+            raise HTTPException(status_code=500, detail=f"GitHub token error: {token_data}")
 
-    # 2) Fetch user information using access_token
-    user_res = requests.get(
-        "https://api.github.com/user",
-        headers={"Authorization": f"Bearer {access_token}"},
-    )
+        # 2) Fetch user information using access_token
+        user_res = await http_client.get_with_retry(
+            GITHUB_USER_URL,
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+    except httpx.HTTPError as exc:
+        raise HTTPException(status_code=500, detail=f"Failed to reach GitHub: {exc}")
 
-    if not user_res.ok:
+    if not user_res.is_success:
         raise HTTPException(status_code=500, detail="Failed to fetch GitHub user")
 
     user = user_res.json()
@@ -262,39 +626,52 @@ def github_callback(code: str):
 GOOGLE_CLIENT_ID = os.environ.get("GOOGLE_CLIENT_ID")
 GOOGLE_CLIENT_SECRET = os.environ.get("GOOGLE_CLIENT_SECRET")
 
+GOOGLE_TOKEN_URL = os.environ.get("GOOGLE_TOKEN_URL", "https://oauth2.googleapis.com/token")
+GOOGLE_USERINFO_URL = os.environ.get("GOOGLE_USERINFO_URL", "https://www.googleapis.com/oauth2/v2/userinfo")
+
 
 @app.get("/auth/google/callback")
-def google_callback(code: str):
+async def google_callback(code: str):
+    """
+    Exchanges a Google authorization code for an access token and returns
+    the user's basic profile, using the shared pooled async client.
+    """
     if not GOOGLE_CLIENT_ID or not GOOGLE_CLIENT_SECRET:
         raise HTTPException(status_code=500, detail="Google OAuth is not configured.")
 
-    # 1) code -> access_token
-    token_res = requests.post(
-        "https://oauth2.googleapis.com/token",
-        data={
-            "client_id": GOOGLE_CLIENT_ID,
-            "client_secret": GOOGLE_CLIENT_SECRET,
-            "code": code,
-            "grant_type": "authorization_code",
-            "redirect_uri": "http://localhost:5173",
-        },
-    )
+    httpx = lazy_import("httpx")
+    client = http_client.get_client()
 
-    if not token_res.ok:
-        raise HTTPException(status_code=500, detail="Failed to exchange Google code")
+    try:
+        # 1) code -> access_token (never retried: codes are single-use)
+        token_res = await client.post(
+            GOOGLE_TOKEN_URL,
+            data={
+                "client_id": GOOGLE_CLIENT_ID,
+                "client_secret": GOOGLE_CLIENT_SECRET,
+                "code": code,
+                "grant_type": "authorization_code",
+                "redirect_uri": OAUTH_REDIRECT_URI,
+            },
+        )
 
-    token_data = token_res.json()
-    access_token = token_data.get("access_token")
-    if not access_token:
-        raise HTTPException(status_code=500, detail="No access token from Google")
+        if not token_res.is_success:
+            raise HTTPException(status_code=500, detail="Failed to exchange Google code")
 
-    # 2) Fetch userinfo
-    user_res = requests.get(
-        "https://www.googleapis.com/oauth2/v2/userinfo",
-        headers={"Authorization": f"Bearer {access_token}"},
-    )
+        token_data = token_res.json()
+        access_token = token_data.get("access_token")
+        if not access_token:
+            raise HTTPException(status_code=500, detail="No access token from Google")
 
-    if not user_res.ok:
+        # 2) Fetch userinfo
+        user_res = await http_client.get_with_retry(
+            GOOGLE_USERINFO_URL,
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+    except httpx.HTTPError as exc:
+        raise HTTPException(status_code=500, detail=f"Failed to reach Google: {exc}")
+
+    if not user_res.is_success:
         raise HTTPException(status_code=500, detail="Failed to fetch Google user")
 
     user = user_res.json()
@@ -310,13 +687,19 @@ def google_callback(code: str):
 # Two-Factor Authentication (2FA) via Email
 # -------------------------------------------------------------
 
+class TwoFASendRequest(BaseModel):
+    user: Optional[str] = None
+
+
 class TwoFASendResponse(BaseModel):
     success: bool
     message: str
+    ticket: Optional[str] = None
 
 
 class TwoFARequest(BaseModel):
     code: str
+    user: Optional[str] = None
 
 
 class TwoFAResponse(BaseModel):
@@ -324,43 +707,84 @@ class TwoFAResponse(BaseModel):
     message: str
 
 
-TWOFA_STORE = {
-    "code": None,
-    "expires_at": 0.0,
-}
-
 TWOFA_SMTP_HOST = os.environ.get("TWOFA_SMTP_HOST", "smtp.gmail.com")
 TWOFA_SMTP_PORT = int(os.environ.get("TWOFA_SMTP_PORT", "587"))
 TWOFA_SMTP_USER = os.environ.get("TWOFA_SMTP_USER")
 TWOFA_SMTP_PASS = os.environ.get("TWOFA_SMTP_PASS")
+# Set to "0" for a local debugging server without TLS
+TWOFA_SMTP_STARTTLS = os.environ.get("TWOFA_SMTP_STARTTLS", "1").lower() in ("1", "true", "yes")
+TWOFA_EMAIL_FROM = os.environ.get("TWOFA_EMAIL_FROM", TWOFA_SMTP_USER)
+# One address, or a comma-separated list of users allowed to receive codes
+# (the first one is used when a request does not name a user)
 TWOFA_EMAIL_TO = os.environ.get("TWOFA_EMAIL_TO")
+TWOFA_RECIPIENTS = [a.strip() for a in (TWOFA_EMAIL_TO or "").split(",") if a.strip()]
+
+# Code lifetime, and where codes live: "memory" (single worker) or
+# "sqlite:///path/to/twofa.db" to share them between workers on one host
+TWOFA_CODE_TTL = int(os.environ.get("TWOFA_CODE_TTL", "300"))
+TWOFA_STORE = code_store.make_store(os.environ.get("TWOFA_STORE_URL", "memory"))
+
+# Background sender that reuses one SMTP connection and batches messages
+TWOFA_MAILER = SMTPDeliveryQueue(
+    TWOFA_SMTP_HOST,
+    TWOFA_SMTP_PORT,
+    user=TWOFA_SMTP_USER,
+    password=TWOFA_SMTP_PASS,
+    starttls=TWOFA_SMTP_STARTTLS,
+)
+
+
+def resolve_twofa_user(user: Optional[str]) -> str:
+    """
+    Map the optional user in a 2FA request to a configured recipient.
+    Codes are only ever mailed to addresses listed in TWOFA_EMAIL_TO.
+    """
+    if user is None:
+        return TWOFA_RECIPIENTS[0] if TWOFA_RECIPIENTS else ""
+    for address in TWOFA_RECIPIENTS:
+        if address.lower() == user.strip().lower():
+            return address
+    raise HTTPException(status_code=400, detail="Unknown 2FA user")
 
 
-def send_twofa_email(code: str):
-    if not (TWOFA_SMTP_USER and TWOFA_SMTP_PASS and TWOFA_EMAIL_TO):
+def queue_twofa_email(to: str, code: str) -> str:
+    """Queue the code email for background delivery and return its ticket id."""
+    if not (TWOFA_EMAIL_FROM and to):
         raise RuntimeError("2FA email settings are not configured")
 
+    EmailMessage = lazy_import("email.message").EmailMessage
+
     msg = EmailMessage()
     msg["Subject"] = "Your 2FA Code"
-    msg["From"] = TWOFA_SMTP_USER
-    msg["To"] = TWOFA_EMAIL_TO
-    msg.set_content(f"Your 2FA code is: {code}\n\nThis code will expire in 5 minutes.")
+    msg["From"] = TWOFA_EMAIL_FROM
+    msg["To"] = to
+    msg.set_content(
+        f"Your 2FA code is: {code}\n\nThis code will expire in {TWOFA_CODE_TTL // 60} minutes."
+    )
+
+    return TWOFA_MAILER.submit(msg)
 
-    with smtplib.SMTP(TWOFA_SMTP_HOST, TWOFA_SMTP_PORT) as server:
-        server.starttls()
-        server.login(TWOFA_SMTP_USER, TWOFA_SMTP_PASS)
-        server.send_message(msg)
 
 @app.post("/auth/2fa/send", response_model=TwoFASendResponse)
-def send_two_fa_code():
+async def send_two_fa_code(req: Optional[TwoFASendRequest] = None):
+    """
+    Issues a code for the user and queues the email. Returns immediately
+    with a ticket; delivery progress is available from /auth/2fa/delivery/{ticket}.
+    """
+    user = resolve_twofa_user(req.user if req else None)
     code = f"{secrets.randbelow(1000000):06d}"
-    expires_at = time.time() + 5 * 60
 
-    TWOFA_STORE["code"] = code
-    TWOFA_STORE["expires_at"] = expires_at
+    # Store the code before emailing it, so a user is never sent a code
+    # that cannot verify; the SQLite store blocks, so keep it off the loop
+    try:
+        await run_in_threadpool(TWOFA_STORE.put, user, code, TWOFA_CODE_TTL)
+    except Exception as exc:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to store 2FA code: {exc}"
+        )
 
     try:
-        send_twofa_email(code)
+        ticket = queue_twofa_email(user, code)
     except Exception as exc:
         raise HTTPException(
             status_code=500, detail=f"Failed to send 2FA email: {exc}"
@@ -368,9 +792,19 @@ def send_two_fa_code():
 
     return TwoFASendResponse(
         success=True,
-        message=f"2FA code sent to {TWOFA_EMAIL_TO}. It will expire in 5 minutes.",
+        message=f"2FA code is being sent to {user}. It will expire in {TWOFA_CODE_TTL // 60} minutes.",
+        ticket=ticket,
     )
 
+
+@app.get("/auth/2fa/delivery/{ticket}")
+async def two_fa_delivery_status(ticket: str):
+    """Reports whether a queued 2FA email is queued, sent or failed."""
+    status = TWOFA_MAILER.status(ticket)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown delivery ticket")
+    return status
+
 # -------------------------------------------------------------
 # 2FA Verification Endpoint
 # -------------------------------------------------------------
@@ -378,17 +812,18 @@ def send_two_fa_code():
 @app.post("/auth/2fa/verify", response_model=TwoFAResponse)
 def verify_two_fa(req: TwoFARequest):
 
-    stored_code = TWOFA_STORE.get("code")
-    expires_at = TWOFA_STORE.get("expires_at", 0.0)
+    result = TWOFA_STORE.check(resolve_twofa_user(req.user), req.code)
 
-    if not stored_code:
+    if result == code_store.MISSING:
         return TwoFAResponse(success=False, message="No 2FA code has been issued.")
 
-    if time.time() > expires_at:
+    if result == code_store.EXPIRED:
         return TwoFAResponse(success=False, message="The 2FA code has expired.")
 
-    if req.code == stored_code:
-        TWOFA_STORE["code"] = None
+    if result == code_store.OK:
         return TwoFAResponse(success=True, message="2FA verification successful.")
     else:
         return TwoFAResponse(success=False, message="Invalid 2FA code.")
+
+# Time spent importing this module (reported on /metrics)
+metrics.STARTUP_SECONDS.set(time.perf_counter() - _IMPORT_START, step="import_app")
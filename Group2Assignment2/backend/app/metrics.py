@@ -0,0 +1,345 @@
+# Collects request, stage and cache metrics and renders them in Prometheus text format.
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# -------------------------------------------------------------
+# Metric primitives
+# -------------------------------------------------------------
+
+# Default latency buckets (seconds). The upper buckets cover KMeans fits
+# and full-table serialization on large datasets.
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    """
+    Base class for a labelled metric family. Values are keyed by the tuple
+    of label values, and all updates go through a lock because sync routes
+    run on the threadpool.
+    """
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count (requests, cache hits, ...)."""
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+            for k, v in items
+        ]
+
+
+class Gauge(_Metric):
+    """
+    Value that can go up and down (in-flight requests, dataset size).
+    A gauge can also be backed by a callback that is evaluated at scrape time.
+    """
+    kind = "gauge"
+
+    def __init__(self, *args, function: Optional[Callable[[], float]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function = function
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        if self._function is not None:
+            value = self._function()
+            return [] if value is None else [f"{self.name} {_format_value(value)}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+            for k, v in items
+        ]
+
+
+class Histogram(_Metric):
+    """Latency distribution with fixed, cumulative buckets."""
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # key -> [per-bucket counts..., sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0.0] * (len(self.buckets) + 1)
+            row[idx] += 1
+            row[-1] += value
+
+    def count(self, **labels) -> int:
+        row = self._values.get(self._key(labels))
+        return 0 if row is None else int(sum(row[:-1]))
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+
+        lines = []
+        for key, row in items:
+            cumulative = 0.0
+            for bound, n in zip(self.buckets, row):
+                cumulative += n
+                labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(row[-1])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(cumulative)}")
+        return lines
+
+
+# -------------------------------------------------------------
+# Registry
+# -------------------------------------------------------------
+REGISTRY: List[_Metric] = []
+
+
+def register(metric: _Metric) -> _Metric:
+    REGISTRY.append(metric)
+    return metric
+
+
+def render() -> str:
+    """Render every registered metric in Prometheus text exposition format."""
+    return "\n".join(m.render() for m in REGISTRY) + "\n"
+
+
+def _resident_memory_bytes() -> Optional[float]:
+    """Current RSS of this process (Linux /proc, falling back to peak RSS)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return float(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE"))
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        return float(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+    except (ImportError, OSError):
+        return None
+
+
+REQUEST_LATENCY = register(Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route", "status"),
+))
+REQUESTS_IN_FLIGHT = register(Gauge(
+    "http_requests_in_flight",
+    "Requests currently being handled.",
+    ("method",),
+))
+STAGE_LATENCY = register(Histogram(
+    "app_stage_duration_seconds",
+    "Time spent in each named stage of a request handler (see stage_timer).",
+    ("route", "stage"),
+))
+CACHE_REQUESTS = register(Counter(
+    "app_cache_requests_total",
+    "Cache lookups by cache name and result (hit/stale/miss).",
+    ("cache", "result"),
+))
+DATASET_BYTES = register(Gauge(
+    "app_dataset_resident_bytes",
+    "Deep memory usage of the loaded DataFrame.",
+))
+DATASET_ROWS = register(Gauge(
+    "app_dataset_rows",
+    "Number of rows in the loaded DataFrame.",
+))
+DATASET_VERSION = register(Gauge(
+    "app_dataset_version",
+    "Version of the loaded dataset (incremented on every load or append).",
+))
+EMAIL_DELIVERIES = register(Counter(
+    "app_email_deliveries_total",
+    "Emails handled by the background delivery queue, by result.",
+    ("result",),
+))
+IMPORT_SECONDS = register(Gauge(
+    "app_import_duration_seconds",
+    "Time taken by deferred imports of heavy modules (first use).",
+    ("module",),
+))
+STARTUP_SECONDS = register(Gauge(
+    "app_startup_duration_seconds",
+    "Time taken by each startup step (app import, preloading).",
+    ("step",),
+))
+PROCESS_RSS = register(Gauge(
+    "process_resident_memory_bytes",
+    "Resident memory size of the API process.",
+    function=_resident_memory_bytes,
+))
+
+
+# -------------------------------------------------------------
+# Stage timers and middleware
+# -------------------------------------------------------------
+
+# ASGI scope of the request being handled, so stage timers can label
+# themselves with the matched route template.
+_CURRENT_SCOPE: ContextVar[Optional[dict]] = ContextVar("metrics_scope", default=None)
+
+
+def _route_template(scope: Optional[dict]) -> str:
+    if not scope:
+        return "<none>"
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path or "<unmatched>"
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """
+    Time one stage of a handler, e.g.:
+
+        with stage_timer("groupby"):
+            avg = dfq.groupby("diet_type")[NUM_COLS].mean()
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe(
+            time.perf_counter() - start,
+            route=_route_template(_CURRENT_SCOPE.get()),
+            stage=stage,
+        )
+
+
+def record_cache(cache: str, hit: bool, stale: bool = False) -> None:
+    result = "stale" if stale else ("hit" if hit else "miss")
+    CACHE_REQUESTS.inc(cache=cache, result=result)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware that records per-route latency histograms and an
+    in-flight request gauge. Routes are labelled by their template
+    (e.g. "/clusters") rather than the raw URL to keep label cardinality low.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope.get("method", "GET")
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        token = _CURRENT_SCOPE.set(scope)
+        REQUESTS_IN_FLIGHT.inc(method=method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec(method=method)
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - start,
+                method=method,
+                route=_route_template(scope),
+                status=str(status["code"]),
+            )
+            _CURRENT_SCOPE.reset(token)
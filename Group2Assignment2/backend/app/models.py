@@ -1,6 +1,6 @@
 # Defines the Pydantic data models for API responses and validation.
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 # -------------------------------------------------------------
 # Core data models used for API responses and validation
@@ -41,6 +41,28 @@ class Recipe(BaseModel):
     fat_g: float
 
 
+class MacroStats(BaseModel):
+    """
+    Summary statistics of one macronutrient over a group of recipes.
+    Mean and variance are None when the group is too small.
+    """
+    sum: float
+    mean: Optional[float] = None
+    var: Optional[float] = None
+    std: Optional[float] = None
+
+
+class CubeCell(BaseModel):
+    """
+    Represents one cell of the diet x cuisine cube (or of a rollup,
+    in which case the summed-out dimension is omitted).
+    """
+    diet_type: Optional[str] = None
+    cuisine_type: Optional[str] = None
+    count: int
+    stats: Dict[str, MacroStats]
+
+
 class ClusterPoint(BaseModel):
     """
     Represents a single data point used for K-Means clustering,
@@ -72,6 +94,61 @@ class AvgResponse(BaseModel):
     items: List[AvgInsight]
 
 
+class CubeTotal(BaseModel):
+    """
+    Grand total over every cell of the selected slice.
+    """
+    count: int
+    stats: Dict[str, MacroStats]
+
+
+class CubeResponse(BaseModel):
+    """
+    Response model for the /insights/cube endpoint.
+    Contains the cells at the requested grouping and the slice total.
+    """
+    group_by: List[str]
+    cells: List[CubeCell]
+    total: CubeTotal
+
+
+class CorrelationResponse(BaseModel):
+    """
+    Response model for the /insights/corr endpoint.
+    Matrices are indexed in the order of `macros`.
+    """
+    diet_type: str
+    count: int
+    macros: List[str]
+    means: Dict[str, float]
+    covariance: List[List[Optional[float]]]
+    correlation: List[List[Optional[float]]]
+
+
+class HistogramBins(BaseModel):
+    """
+    Histogram with `len(edges) - 1` equal-width bins.
+    """
+    edges: List[float]
+    counts: List[int]
+
+
+class DistributionResponse(BaseModel):
+    """
+    Response model for the /insights/distribution endpoint.
+    Quantiles and bin counts are approximate (see sketches.py).
+    """
+    diet_type: str
+    macro: str
+    count: int
+    min: float
+    max: float
+    mean: float
+    std: Optional[float] = None
+    quantiles: Dict[str, float]
+    histogram: HistogramBins
+
+
 class ClusterResponse(BaseModel):
     """
     Response model for the /clusters endpoint.
@@ -0,0 +1,327 @@
+# Opt-in per-request profiling for the API (cProfile + downloadable pstats artifacts).
+import cProfile
+import heapq
+import io
+import itertools
+import marshal
+import os
+import pstats
+import random
+import secrets
+import sys
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+from inspect import iscoroutinefunction
+from typing import Deque, Dict, List, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query # type: ignore
+from fastapi.responses import PlainTextResponse, Response # type: ignore
+from fastapi.routing import APIRoute # type: ignore
+
+# -------------------------------------------------------------
+# Configuration (environment variables)
+# -------------------------------------------------------------
+# PROFILING_ENABLED      "1"/"true" turns the hook on. When off, neither the
+#                        middleware nor the route wrapper is installed.
+# PROFILING_TOKEN        Admin token required in X-Profile-Token (optional in dev)
+# PROFILING_SLOWEST      Size of the "slowest N requests" buffer (default 10)
+# PROFILING_RECENT       How many recent profiles stay downloadable (default 20)
+# PROFILING_SAMPLE_RATE  Fraction of requests profiled without a header (default 0)
+ENABLED = os.environ.get("PROFILING_ENABLED", "").lower() in ("1", "true", "yes")
+TOKEN = os.environ.get("PROFILING_TOKEN")
+SLOWEST_N = int(os.environ.get("PROFILING_SLOWEST", "10"))
+RECENT_N = int(os.environ.get("PROFILING_RECENT", "20"))
+SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", "0"))
+
+PROFILE_HEADER = b"x-profile"
+TOKEN_HEADER = b"x-profile-token"
+
+# Before Python 3.12 cProfile hooks one thread, so sync handlers need their
+# own profiler in the threadpool. From 3.12 it is built on sys.monitoring:
+# a profiler sees every thread, and only one may be active per process.
+PER_THREAD_PROFILERS = sys.version_info < (3, 12)
+
+
+# -------------------------------------------------------------
+# Profile sessions and storage
+# -------------------------------------------------------------
+class ProfileSession:
+    """
+    All cProfile profilers that belong to one request: one for the event
+    loop thread (routing, validation, async handlers, serialization) and,
+    before Python 3.12, one per threadpool call for sync handlers.
+    """
+
+    def __init__(self):
+        self.id = secrets.token_hex(8)
+        self.profilers: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def new_profiler(self) -> cProfile.Profile:
+        prof = cProfile.Profile()
+        with self._lock:
+            self.profilers.append(prof)
+        return prof
+
+    def stats(self) -> pstats.Stats:
+        stats = pstats.Stats(self.profilers[0], stream=io.StringIO())
+        for prof in self.profilers[1:]:
+            stats.add(prof)
+        return stats
+
+
+@dataclass
+class ProfileRecord:
+    id: str
+    method: str
+    path: str
+    status: int
+    duration_s: float
+    started_at: float
+    stats: pstats.Stats
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "duration_ms": round(self.duration_s * 1000, 3),
+            "started_at": self.started_at,
+        }
+
+    def pstats_bytes(self) -> bytes:
+        # Same format as pstats.Stats.dump_stats(), loadable with pstats/snakeviz
+        return marshal.dumps(self.stats.stats)
+
+    def text(self, sort: str = "cumulative", limit: int = 50) -> str:
+        out = io.StringIO()
+        self.stats.stream = out
+        self.stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+class ProfileStore:
+    """
+    Keeps the most recent profiles plus a min-heap of the N slowest ones,
+    so a slow outlier survives even after many fast requests.
+    """
+
+    def __init__(self, slowest: int = SLOWEST_N, recent: int = RECENT_N):
+        self.slowest_n = slowest
+        self._records: Dict[str, ProfileRecord] = {}
+        self._recent: Deque[str] = deque(maxlen=recent)
+        self._slowest: List[tuple] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def add(self, record: ProfileRecord) -> None:
+        with self._lock:
+            self._records[record.id] = record
+            self._recent.append(record.id)
+
+            entry = (record.duration_s, next(self._seq), record.id)
+            if len(self._slowest) < self.slowest_n:
+                heapq.heappush(self._slowest, entry)
+            elif entry > self._slowest[0]:
+                heapq.heapreplace(self._slowest, entry)
+
+            keep = set(self._recent) | {rid for _, _, rid in self._slowest}
+            for rid in [r for r in self._records if r not in keep]:
+                del self._records[rid]
+
+    def get(self, profile_id: str) -> Optional[ProfileRecord]:
+        return self._records.get(profile_id)
+
+    def slowest(self) -> List[ProfileRecord]:
+        with self._lock:
+            ids = [rid for _, _, rid in sorted(self._slowest, reverse=True)]
+        return [self._records[rid] for rid in ids if rid in self._records]
+
+    def recent(self) -> List[ProfileRecord]:
+        with self._lock:
+            ids = list(reversed(self._recent))
+        return [self._records[rid] for rid in ids if rid in self._records]
+
+
+STORE = ProfileStore()
+
+# Profiling session of the request being handled (copied into the threadpool)
+_SESSION: ContextVar[Optional[ProfileSession]] = ContextVar("profile_session", default=None)
+
+
+# -------------------------------------------------------------
+# Hooks: ASGI middleware and route class
+# -------------------------------------------------------------
+def _token_ok(token: Optional[str]) -> bool:
+    return TOKEN is None or (token is not None and secrets.compare_digest(token, TOKEN))
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request when it carries `X-Profile: 1` (and a valid
+    `X-Profile-Token` if PROFILING_TOKEN is set), or when it is picked by
+    PROFILING_SAMPLE_RATE. The response gets an `X-Profile-Id` header
+    pointing at /debug/profiles/{id}.
+
+    Only one request at a time gets a profile; requests that ask for one
+    meanwhile are answered with `X-Profile-Skipped: busy`. The profiler
+    records everything the event loop runs while it is on, so work of
+    concurrent requests (and, from Python 3.12, of every thread) ends up
+    in the active profile as well. Profile on a quiet worker when exact
+    per-request numbers matter.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._busy = threading.Lock()
+
+    def _wants_profile(self, scope) -> bool:
+        headers = dict(scope.get("headers") or ())
+        flag = headers.get(PROFILE_HEADER)
+        if flag is not None:
+            token = headers.get(TOKEN_HEADER)
+            return flag in (b"1", b"true") and _token_ok(token.decode() if token else None)
+        return SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        if not self._busy.acquire(blocking=False):
+            async def send_busy(message):
+                if message["type"] == "http.response.start":
+                    message.setdefault("headers", []).append((b"x-profile-skipped", b"busy"))
+                await send(message)
+            await self.app(scope, receive, send_busy)
+            return
+
+        session = ProfileSession()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message.setdefault("headers", []).append((b"x-profile-id", session.id.encode()))
+            await send(message)
+
+        token = _SESSION.set(session)
+        loop_profiler = session.new_profiler()
+        started_at = time.time()
+        start = time.perf_counter()
+        loop_profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            loop_profiler.disable()
+            duration = time.perf_counter() - start
+            _SESSION.reset(token)
+            self._busy.release()
+            STORE.add(ProfileRecord(
+                id=session.id,
+                method=scope.get("method", "GET"),
+                path=scope.get("path", ""),
+                status=status["code"],
+                duration_s=duration,
+                started_at=started_at,
+                stats=session.stats(),
+            ))
+
+
+def _profiled_sync(func):
+    """Wrap a sync endpoint so it is profiled inside its threadpool thread."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        session = _SESSION.get()
+        # From 3.12 the middleware's profiler already covers this thread,
+        # and enabling a second one would raise ValueError
+        if session is None or not PER_THREAD_PROFILERS:
+            return func(*args, **kwargs)
+        prof = session.new_profiler()
+        prof.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            prof.disable()
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """
+    Route class that makes sync endpoints visible to the profiler on
+    Python < 3.12. Async endpoints run on the event loop and are already
+    covered by the middleware's profiler, so they are left untouched.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if not iscoroutinefunction(endpoint):
+            endpoint = _profiled_sync(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+# -------------------------------------------------------------
+# Artifact endpoints
+# -------------------------------------------------------------
+router = APIRouter(prefix="/debug/profiles", tags=["profiling"])
+
+
+def _require_token(x_profile_token: Optional[str]) -> None:
+    if not _token_ok(x_profile_token):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+
+@router.get("")
+def list_profiles(x_profile_token: Optional[str] = Header(None)):
+    """Lists the slowest N profiled requests and the most recent ones."""
+    _require_token(x_profile_token)
+    return {
+        "slowest": [r.summary() for r in STORE.slowest()],
+        "recent": [r.summary() for r in STORE.recent()],
+    }
+
+
+@router.get("/{profile_id}")
+def download_profile(
+    profile_id: str,
+    format: str = Query("pstats", pattern="^(pstats|text)$"),
+    sort: str = Query("cumulative"),
+    x_profile_token: Optional[str] = Header(None),
+):
+    """
+    Returns one profile as a pstats file (for `python -m pstats`, snakeviz,
+    etc.) or as a plain-text report sorted by `sort`.
+    """
+    _require_token(x_profile_token)
+    record = STORE.get(profile_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Profile not found or already evicted")
+
+    if format == "text":
+        try:
+            return PlainTextResponse(record.text(sort=sort))
+        except KeyError:
+            raise HTTPException(status_code=400, detail=f"Unknown sort key: {sort}")
+
+    return Response(
+        content=record.pstats_bytes(),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.pstats"'},
+    )
+
+
+def install(app) -> None:
+    """
+    Attach the profiling hook to `app`. Must be called before routes are
+    declared so that they are created with ProfiledRoute. Does nothing
+    unless PROFILING_ENABLED is set, keeping the disabled path free.
+    """
+    if not ENABLED:
+        return
+    app.router.route_class = ProfiledRoute
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(router)
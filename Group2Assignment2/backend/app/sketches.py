@@ -0,0 +1,216 @@
+# Mergeable per-diet sketches of the macro columns (covariance and quantiles).
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .utils import NUM_COLS
+
+# Fixed histogram layout shared by every HistogramSketch so that sketches
+# built on different partitions can be merged bin by bin. Bins are uniform
+# in log1p(grams) up to HIST_MAX, which bounds the quantile error to about
+# log1p(HIST_MAX) / HIST_BINS (~1.8%) relative to the value.
+HIST_BINS = 512
+HIST_MAX = 10_000.0
+_LOG_MAX = float(np.log1p(HIST_MAX))
+
+
+class MomentSketch:
+    """
+    Count, mean vector and co-moment matrix (sum of centered cross
+    products) of a set of rows.
+
+    Batches are folded in with the pairwise Welford update (Chan et al.),
+    which is numerically stable and associative, so sketches of separate
+    partitions merge into exactly the sketch of their union.
+    """
+
+    def __init__(self, n: int, mean: np.ndarray, comoment: np.ndarray):
+        self.n = n
+        self.mean = mean
+        self.comoment = comoment
+
+    @classmethod
+    def empty(cls, dims: int) -> "MomentSketch":
+        return cls(0, np.zeros(dims), np.zeros((dims, dims)))
+
+    @classmethod
+    def from_array(cls, x: np.ndarray) -> "MomentSketch":
+        """Build a sketch from a (rows, dims) array."""
+        if len(x) == 0:
+            return cls.empty(x.shape[1])
+        mean = x.mean(axis=0)
+        centered = x - mean
+        return cls(len(x), mean, centered.T @ centered)
+
+    def merge(self, other: "MomentSketch") -> "MomentSketch":
+        """Return the sketch of the union of both inputs."""
+        if other.n == 0:
+            return MomentSketch(self.n, self.mean.copy(), self.comoment.copy())
+        if self.n == 0:
+            return MomentSketch(other.n, other.mean.copy(), other.comoment.copy())
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        mean = self.mean + delta * (other.n / n)
+        comoment = self.comoment + other.comoment + np.outer(delta, delta) * (self.n * other.n / n)
+        return MomentSketch(n, mean, comoment)
+
+    def covariance(self, ddof: int = 1) -> np.ndarray:
+        if self.n <= ddof:
+            return np.full_like(self.comoment, np.nan)
+        return self.comoment / (self.n - ddof)
+
+    def correlation(self) -> np.ndarray:
+        cov = self.covariance()
+        std = np.sqrt(np.diag(cov))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return cov / np.outer(std, std)
+
+
+class HistogramSketch:
+    """
+    Fixed-bin histogram of one column plus its exact count, min and max.
+
+    Bin edges are the same for every sketch (see HIST_BINS / HIST_MAX), so
+    merging is adding the bin counts. Quantiles and CDF values interpolate
+    linearly inside a bin in log1p space; negative values fall into the
+    first bin and values above HIST_MAX into the last one, and results are
+    clamped to the exact [min, max].
+    """
+
+    def __init__(self, counts: np.ndarray, minimum: float = np.inf, maximum: float = -np.inf):
+        self.counts = counts
+        self.min = minimum
+        self.max = maximum
+
+    @property
+    def n(self) -> int:
+        return int(self.counts.sum())
+
+    @staticmethod
+    def bin_of(values: np.ndarray) -> np.ndarray:
+        """Histogram bin index of each value."""
+        t = np.log1p(np.clip(values, 0.0, HIST_MAX))
+        return np.minimum((t * (HIST_BINS / _LOG_MAX)).astype(np.int64), HIST_BINS - 1)
+
+    @classmethod
+    def from_array(cls, values: np.ndarray) -> "HistogramSketch":
+        counts = np.bincount(cls.bin_of(values), minlength=HIST_BINS)
+        if len(values) == 0:
+            return cls(counts)
+        return cls(counts, float(values.min()), float(values.max()))
+
+    def merge(self, other: "HistogramSketch") -> "HistogramSketch":
+        return HistogramSketch(
+            self.counts + other.counts, min(self.min, other.min), max(self.max, other.max)
+        )
+
+    def quantiles(self, qs: Sequence[float]) -> List[Optional[float]]:
+        """Approximate quantiles for probabilities in [0, 1]."""
+        n = self.n
+        if n == 0:
+            return [None for _ in qs]
+        cum = np.concatenate([[0], np.cumsum(self.counts)])
+        targets = np.clip(np.asarray(qs, dtype=np.float64), 0.0, 1.0) * n
+        # Bin containing each target rank, and the position inside it
+        idx = np.clip(np.searchsorted(cum, targets, side="left") - 1, 0, HIST_BINS - 1)
+        within = self.counts[idx]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            frac = np.where(within > 0, (targets - cum[idx]) / within, 0.0)
+        t = (idx + np.clip(frac, 0.0, 1.0)) * (_LOG_MAX / HIST_BINS)
+        values = np.clip(np.expm1(t), self.min, self.max)
+        return [float(v) for v in values]
+
+    def cdf(self, values: np.ndarray) -> np.ndarray:
+        """Approximate fraction of rows <= each value."""
+        n = self.n
+        if n == 0:
+            return np.zeros(len(values))
+        cum = np.concatenate([[0], np.cumsum(self.counts)])
+        pos = np.log1p(np.clip(values, 0.0, HIST_MAX)) * (HIST_BINS / _LOG_MAX)
+        idx = np.minimum(pos.astype(np.int64), HIST_BINS - 1)
+        below = cum[idx] + self.counts[idx] * np.clip(pos - idx, 0.0, 1.0)
+        below = np.where(values >= self.max, n, np.where(values < self.min, 0, below))
+        return below / n
+
+    def histogram(self, bins: int) -> dict:
+        """Approximate counts for `bins` equal-width bins between min and max."""
+        n = self.n
+        if n == 0:
+            return {"edges": [], "counts": []}
+        edges = np.linspace(self.min, self.max, bins + 1)
+        cdf = self.cdf(edges)
+        cdf[0], cdf[-1] = 0.0, 1.0
+        # Rounding the cumulative counts keeps the total equal to n
+        counts = np.diff(np.round(cdf * n).astype(np.int64))
+        return {"edges": [float(e) for e in edges], "counts": [int(c) for c in counts]}
+
+
+class MacroSketches:
+    """
+    A MomentSketch over all macros and a HistogramSketch per macro for
+    every diet, plus the "all" sketch obtained by merging the diets.
+
+    Built in one pass at ingest (histogram counts for every diet come from
+    a single bincount), and merge() combines sketches of data partitions.
+    """
+
+    def __init__(self, diets: Dict[str, dict], macros: Sequence[str] = NUM_COLS):
+        self.macros = list(macros)
+        self.diets = diets
+        self._combine()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, macros: Sequence[str] = NUM_COLS) -> "MacroSketches":
+        codes, labels = pd.factorize(df["diet_type"], sort=True)
+        x = df[list(macros)].to_numpy(dtype=np.float64)
+
+        # Per-diet histogram counts for every macro: bincount over (diet, bin)
+        hist = [
+            np.bincount(
+                codes * HIST_BINS + HistogramSketch.bin_of(x[:, j]),
+                minlength=len(labels) * HIST_BINS,
+            ).reshape(len(labels), HIST_BINS)
+            for j in range(len(macros))
+        ]
+
+        diets = {}
+        for i, diet in enumerate(labels):
+            rows = x[codes == i]
+            diets[str(diet)] = {
+                "moments": MomentSketch.from_array(rows),
+                "hist": {
+                    macro: HistogramSketch(hist[j][i], float(rows[:, j].min()), float(rows[:, j].max()))
+                    for j, macro in enumerate(macros)
+                },
+            }
+        return cls(diets, macros)
+
+    @staticmethod
+    def _merge_entries(entries: Iterable[dict], macros: Sequence[str]) -> dict:
+        merged = {
+            "moments": MomentSketch.empty(len(macros)),
+            "hist": {m: HistogramSketch(np.zeros(HIST_BINS, dtype=np.int64)) for m in macros},
+        }
+        for entry in entries:
+            merged["moments"] = merged["moments"].merge(entry["moments"])
+            for m in macros:
+                merged["hist"][m] = merged["hist"][m].merge(entry["hist"][m])
+        return merged
+
+    def _combine(self) -> None:
+        self.all = self._merge_entries(self.diets.values(), self.macros)
+
+    def merge(self, other: "MacroSketches") -> "MacroSketches":
+        """Return the sketches of the union of two partitions."""
+        diets = {}
+        for diet in sorted(set(self.diets) | set(other.diets)):
+            parts = [s.diets[diet] for s in (self, other) if diet in s.diets]
+            diets[diet] = self._merge_entries(parts, self.macros)
+        return MacroSketches(diets, self.macros)
+
+    def get(self, diet: str) -> Optional[dict]:
+        """Sketches of one diet, or of every row for "all"."""
+        if diet == "all":
+            return self.all
+        return self.diets.get(diet)
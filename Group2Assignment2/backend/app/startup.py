@@ -0,0 +1,84 @@
+# Startup policy: deferred imports for heavy SDKs and eager preloading before the worker is ready.
+import importlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------------------
+# Configuration (environment variables)
+# -------------------------------------------------------------
+# PRELOAD_DATA     "1" (default) loads the CSV and its derived indexes during
+#                  startup, so the first request does not pay for it.
+# PRELOAD_MODULES  Comma-separated modules to import during startup instead of
+#                  on first use, e.g. "sklearn.cluster,azure.identity".
+PRELOAD_DATA = os.environ.get("PRELOAD_DATA", "1").lower() in ("1", "true", "yes")
+PRELOAD_MODULES: List[str] = [
+    m.strip() for m in os.environ.get("PRELOAD_MODULES", "").split(",") if m.strip()
+]
+
+# Modules already imported through lazy_import()
+_LOADED: Dict[str, object] = {}
+_LOCK = threading.Lock()
+
+
+def lazy_import(name: str):
+    """
+    Import a module on first use and record how long the import took.
+    Used for SDKs that only a few routes need (scikit-learn, Azure, requests,
+    smtplib), so /health and the data routes do not pay for them.
+
+    Args:
+        name (str): Absolute module name, e.g. "sklearn.cluster"
+
+    Returns:
+        module: The imported module
+    """
+    module = _LOADED.get(name)
+    if module is not None:
+        return module
+
+    with _LOCK:
+        module = _LOADED.get(name)
+        if module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(name)
+            elapsed = time.perf_counter() - start
+            metrics.IMPORT_SECONDS.set(elapsed, module=name)
+            logger.info("imported %s in %.1f ms", name, elapsed * 1000)
+            _LOADED[name] = module
+    return module
+
+
+@contextmanager
+def timed_step(step: str):
+    """Time one startup step and publish it as app_startup_duration_seconds."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.STARTUP_SECONDS.set(elapsed, step=step)
+        logger.info("startup step %s took %.1f ms", step, elapsed * 1000)
+
+
+def preload(load_dataset: Callable[[], object]) -> None:
+    """
+    Run the configured preloading before the app starts accepting requests.
+
+    Args:
+        load_dataset (Callable): Loads the dataset and its derived indexes
+    """
+    with timed_step("preload_total"):
+        if PRELOAD_DATA:
+            with timed_step("preload_data"):
+                load_dataset()
+        for name in PRELOAD_MODULES:
+            with timed_step(f"preload_module:{name}"):
+                lazy_import(name)
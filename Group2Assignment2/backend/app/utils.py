@@ -1,6 +1,6 @@
 # provides helper functions to clean and filter the dataset
 import pandas as pd
-from typing import List
+from typing import List, Optional
 
 # -------------------------------------------------------------
 # Utility functions for data cleaning and filtering
@@ -20,7 +20,7 @@ NORMALIZE_MAP = {
 NUM_COLS = ["protein_g", "carbs_g", "fat_g"]
 
 
-def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+def normalize_columns(df: pd.DataFrame, fill_values: Optional[pd.Series] = None) -> pd.DataFrame:
     """
     Cleans and standardizes the input DataFrame:
       - Renames inconsistent column headers to snake_case
@@ -29,6 +29,9 @@ def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
 
     Args:
         df (pd.DataFrame): Raw dataset loaded from CSV
+        fill_values (pd.Series): Optional per-column values used instead of
+            the column means of `df` (e.g. the dataset means when `df` only
+            holds rows being appended)
 
     Returns:
         pd.DataFrame: Cleaned and normalized DataFrame
@@ -49,9 +52,9 @@ def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
 
     # Fill any missing numeric values with the mean of the column
     if present_num_cols:
-        df[present_num_cols] = df[present_num_cols].fillna(
-            df[present_num_cols].mean(numeric_only=True)
-        )
+        if fill_values is None:
+            fill_values = df[present_num_cols].mean(numeric_only=True)
+        df[present_num_cols] = df[present_num_cols].fillna(fill_values)
 
     return df
 
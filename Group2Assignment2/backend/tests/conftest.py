@@ -0,0 +1,31 @@
+# Shared fixtures for the backend tests (run from Group2Assignment2/backend).
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Import the `app` package without installing it, and skip the startup preload
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("PRELOAD_DATA", "0")
+
+CSV_PATH = Path(__file__).resolve().parents[2] / "data" / "All_Diets.csv"
+
+
+@pytest.fixture(scope="session")
+def raw_frame() -> pd.DataFrame:
+    """The All_Diets.csv dataset with its original headers."""
+    return pd.read_csv(CSV_PATH)
+
+
+@pytest.fixture
+def base_csv(raw_frame, tmp_path):
+    """The first 6,000 recipes as a fresh dataset; the rest are appended."""
+    from app import data_loader
+
+    path = tmp_path / "All_Diets.csv"
+    raw_frame.iloc[:6000].to_csv(path, index=False)
+    data_loader._SNAPSHOT = None
+    yield path
+    data_loader._SNAPSHOT = None
@@ -0,0 +1,43 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+
+
+@pytest.fixture
+def client(base_csv, monkeypatch):
+    monkeypatch.setattr(main, "CSV_PATH", base_csv)
+    monkeypatch.setattr(main, "INGEST_TOKEN", "secret")
+    return TestClient(main.app, headers={"X-Ingest-Token": "secret"})
+
+
+def test_append_requires_token(client, monkeypatch):
+    res = client.post("/ingest/append", json=[], headers={"X-Ingest-Token": "wrong"})
+    assert res.status_code == 403
+
+    monkeypatch.setattr(main, "INGEST_TOKEN", None)
+    res = client.post("/ingest/append", json=[])
+    assert res.status_code == 403
+    assert "disabled" in res.json()["detail"]
+
+
+def test_append_csv_and_json(client, raw_frame):
+    res = client.post(
+        "/ingest/append",
+        content=raw_frame.iloc[6000:6010].to_csv(index=False),
+        headers={"content-type": "text/csv"},
+    )
+    assert res.status_code == 200
+    assert res.json()["rows"] == 6010
+
+    records = [{"Diet_type": "Keto", "Recipe_name": "X", "Cuisine_type": "french",
+                "Protein(g)": 10, "Carbs(g)": 2, "Fat(g)": 3}]
+    res = client.post("/ingest/append", json=records)
+    assert res.status_code == 200
+    assert client.get("/dataset").json() == {"version": res.json()["version"], "rows": 6011}
+
+
+@pytest.mark.parametrize("body", ["[1, 2]", '["a"]', '{"a": 1}', "{", "[]"])
+def test_append_rejects_invalid_json(client, body):
+    res = client.post("/ingest/append", content=body, headers={"content-type": "application/json"})
+    assert res.status_code == 400
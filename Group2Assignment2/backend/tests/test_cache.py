@@ -0,0 +1,152 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import azure_clients, main
+from app.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Loader:
+    """Counts calls; each call returns the call number unless told to fail or wait."""
+
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, key):
+        self.calls += 1
+        self.gate.wait(5)
+        if self.fail:
+            raise RuntimeError("backend down")
+        return self.calls
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def loader():
+    return Loader()
+
+
+@pytest.fixture
+def cache(loader, clock):
+    return TTLCache("test", loader, ttl=10, stale_ttl=20, clock=clock)
+
+
+def wait_for_refresh(cache, key):
+    future = cache._inflight.get(key)
+    if future is not None:
+        future.exception(timeout=5)
+
+
+def test_fresh_entry_is_served_from_memory(cache, loader, clock):
+    assert cache.get("k") == 1
+    clock.now = 9.9
+    assert cache.get("k") == 1
+    assert loader.calls == 1
+
+
+def test_stale_entry_is_served_while_one_refresh_runs(cache, loader, clock):
+    cache.get("k")
+    clock.now = 15
+    loader.gate.clear()
+
+    # Every stale read returns at once; only one refresh is started
+    assert [cache.get("k") for _ in range(5)] == [1] * 5
+    loader.gate.set()
+    wait_for_refresh(cache, "k")
+    assert loader.calls == 2
+    assert cache.get("k") == 2
+
+
+def test_failed_refresh_keeps_stale_value(cache, loader, clock):
+    cache.get("k")
+    clock.now = 15
+    loader.fail = True
+
+    assert cache.get("k") == 1
+    wait_for_refresh(cache, "k")
+    assert cache.get("k") == 1
+
+    # Past the stale window the caller waits for the load and sees its error
+    clock.now = 31
+    with pytest.raises(RuntimeError):
+        cache.get("k")
+
+
+def test_concurrent_cold_loads_share_one_fetch(cache, loader):
+    loader.gate.clear()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("k"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    loader.gate.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == [1] * 8
+    assert loader.calls == 1
+
+
+def test_invalidate_forces_reload(cache, loader):
+    cache.get("k")
+    cache.invalidate("k")
+    assert cache.get("k") == 2
+
+
+class FakeStorageAccounts:
+    def __init__(self):
+        self.calls = 0
+
+    def get_properties(self, resource_group_name, account_name):
+        self.calls += 1
+        blob = SimpleNamespace(enabled=account_name == "encrypted")
+        return SimpleNamespace(encryption=SimpleNamespace(services=SimpleNamespace(blob=blob)))
+
+
+@pytest.fixture
+def storage_accounts(monkeypatch):
+    monkeypatch.setenv("AZURE_SUBSCRIPTION_ID", "sub")
+    monkeypatch.setenv("AZURE_RESOURCE_GROUP", "rg")
+    accounts = FakeStorageAccounts()
+    azure_clients.configure(
+        credential_factory=object,
+        storage_client_factory=lambda credential, subscription_id: SimpleNamespace(
+            storage_accounts=accounts),
+    )
+    main.SECURITY_STATUS_CACHE.invalidate()
+    yield accounts
+    main.SECURITY_STATUS_CACHE.invalidate()
+    azure_clients.configure()
+
+
+def test_security_status_is_cached(storage_accounts, monkeypatch):
+    monkeypatch.setenv("AZURE_STORAGE_ACCOUNT", "encrypted")
+    client = TestClient(main.app)
+
+    first = client.get("/security/status").json()
+    second = client.get("/security/status").json()
+    assert first == second
+    assert first["encryption"] == "Enabled" and first["security_status"] == "Secure"
+    assert storage_accounts.calls == 1
+
+
+def test_security_status_reports_disabled_encryption(storage_accounts, monkeypatch):
+    monkeypatch.setenv("AZURE_STORAGE_ACCOUNT", "plain")
+    status = TestClient(main.app).get("/security/status").json()
+    assert status["encryption"] == "Disabled" and status["compliance"] == "Failed"
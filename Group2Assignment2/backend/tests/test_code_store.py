@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+
+from app import code_store
+from app.code_store import EXPIRED, INVALID, MISSING, OK
+
+
+@pytest.fixture
+def now(monkeypatch):
+    """Fake wall clock for the stores; set now[0] to move time."""
+    now = [1_000_000.0]
+    monkeypatch.setattr(code_store.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def make(grace=60.0):
+        if request.param == "memory":
+            return code_store.MemoryCodeStore(grace=grace)
+        return code_store.SQLiteCodeStore(str(tmp_path / "codes.db"), grace=grace)
+    return make
+
+
+def test_code_works_once(make_store, now):
+    store = make_store()
+    store.put("alice", "123456", ttl=300)
+    assert store.check("alice", "000000") == INVALID
+    assert store.check("alice", "123456") == OK
+    assert store.check("alice", "123456") == MISSING
+
+
+def test_codes_are_per_user_and_replaced(make_store, now):
+    store = make_store()
+    store.put("alice", "111111", ttl=300)
+    store.put("bob", "222222", ttl=300)
+    store.put("alice", "333333", ttl=300)
+    assert store.check("bob", "111111") == INVALID
+    assert store.check("alice", "111111") == INVALID
+    assert store.check("alice", "333333") == OK
+    assert store.check("bob", "222222") == OK
+
+
+def test_expired_code_answers_expired_during_grace(make_store, now):
+    store = make_store(grace=60)
+    store.put("alice", "123456", ttl=300)
+    now[0] += 301
+    assert store.check("alice", "123456") == EXPIRED
+    now[0] += 58
+    assert store.check("alice", "123456") == EXPIRED
+
+    # After the grace window the code is purged
+    now[0] += 3
+    store.put("bob", "222222", ttl=300)
+    assert store.check("alice", "123456") == MISSING
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path, now):
+    path = str(tmp_path / "codes.db")
+    writer = code_store.SQLiteCodeStore(path)
+    reader = code_store.SQLiteCodeStore(path)
+
+    writer.put("alice", "123456", ttl=300)
+    assert reader.check("alice", "123456") == OK
+    assert writer.check("alice", "123456") == MISSING
+
+
+def test_sqlite_code_is_consumed_once_across_threads(tmp_path, now):
+    store = code_store.SQLiteCodeStore(str(tmp_path / "codes.db"))
+    store.put("alice", "123456", ttl=300)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.check("alice", "123456")))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(OK) == 1
+
+
+def test_make_store(tmp_path):
+    assert isinstance(code_store.make_store("memory"), code_store.MemoryCodeStore)
+    store = code_store.make_store(f"sqlite:///{tmp_path / 'codes.db'}")
+    assert isinstance(store, code_store.SQLiteCodeStore)
+    with pytest.raises(ValueError):
+        code_store.make_store("redis://localhost")
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from app.cube import MacroCube
+from app.utils import normalize_columns
+
+
+@pytest.fixture(scope="module")
+def df(raw_frame):
+    return normalize_columns(raw_frame)
+
+
+@pytest.fixture(scope="module")
+def cube(df):
+    return MacroCube.from_frame(df)
+
+
+def test_cells_match_groupby(df, cube):
+    expected = df.groupby(["diet_type", "cuisine_type"])["protein_g"].agg(["count", "mean", "var"])
+    result = cube.query()
+    assert len(result["cells"]) == len(expected)
+    for cell in result["cells"]:
+        row = expected.loc[(cell["diet_type"], cell["cuisine_type"])]
+        stats = cell["stats"]["protein_g"]
+        assert cell["count"] == row["count"]
+        assert stats["mean"] == pytest.approx(row["mean"])
+        if cell["count"] > 1:
+            assert stats["var"] == pytest.approx(row["var"])
+    assert result["total"]["count"] == len(df)
+
+
+def test_permuted_filter_keeps_labels_with_their_stats(df, cube):
+    counts = df["diet_type"].value_counts()
+    diets = list(reversed(cube.diets))
+    result = cube.query(diets=diets, group_by=["diet_type"])
+    assert [c["diet_type"] for c in result["cells"]] == diets
+    for cell in result["cells"]:
+        assert cell["count"] == counts[cell["diet_type"]]
+        assert cell["stats"]["fat_g"]["mean"] == pytest.approx(
+            df.loc[df["diet_type"] == cell["diet_type"], "fat_g"].mean())
+
+
+def test_repeated_filter_is_counted_once(df, cube):
+    keto = df[df["diet_type"] == "keto"]
+    result = cube.query(diets=["keto"] * len(cube.diets), group_by=["diet_type"])
+    assert [c["diet_type"] for c in result["cells"]] == ["keto"]
+    assert result["cells"][0]["count"] == len(keto)
+    assert result["total"]["count"] == len(keto)
+
+    by_cuisine = cube.query(diets=["keto", "keto"], group_by=["cuisine_type"])
+    assert sum(c["count"] for c in by_cuisine["cells"]) == len(keto)
+
+
+def test_merge_equals_cube_of_union(df, cube):
+    merged = MacroCube.from_frame(df.iloc[:3000]).merge(MacroCube.from_frame(df.iloc[3000:]))
+    assert merged.diets == cube.diets and merged.cuisines == cube.cuisines
+    np.testing.assert_array_equal(merged.count, cube.count)
+    np.testing.assert_allclose(merged.sums, cube.sums)
+    np.testing.assert_allclose(merged.sumsq, cube.sumsq)
@@ -0,0 +1,97 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import data_loader
+
+
+def test_snapshot_pairs_frame_with_its_indexes(raw_frame, base_csv):
+    before = data_loader.get_snapshot(base_csv)
+    result = data_loader.append_data(raw_frame.iloc[6000:7000], base_csv)
+    after = data_loader.get_snapshot(base_csv)
+
+    # A reader holding the old snapshot keeps a consistent frame and index
+    assert len(before.df) == 6000
+    assert before.indexes["protein_order"]["all"].max() < len(before.df)
+    before.df.iloc[before.indexes["protein_order"]["all"]]
+
+    assert len(after.df) == result["rows"] == 7000
+    assert len(after.indexes["protein_order"]["all"]) == 7000
+    assert after.version == result["version"] > before.version
+    assert data_loader.dataset_version() == after.version
+
+
+def test_append_fills_missing_macros_with_dataset_means(raw_frame, base_csv):
+    means = data_loader.load_data(base_csv)[["protein_g", "carbs_g", "fat_g"]].mean()
+    delta = raw_frame.iloc[6000:6002].copy()
+    delta["Protein(g)"] = [999.0, None]
+    delta["Fat(g)"] = [None, None]
+
+    data_loader.append_data(delta, base_csv)
+    added = data_loader.load_data(base_csv).iloc[-2:]
+
+    assert added["protein_g"].tolist() == [999.0, pytest.approx(means["protein_g"])]
+    assert added["fat_g"].tolist() == [pytest.approx(means["fat_g"])] * 2
+
+
+def test_incremental_indexes_match_full_rebuild(raw_frame, base_csv):
+    data_loader.load_data(base_csv)
+
+    first = raw_frame.iloc[6000:7000].copy()
+    # A diet and cuisine the base data has never seen, and protein ties
+    first.iloc[:5, first.columns.get_loc("Diet_type")] = "NewDiet"
+    first.iloc[:3, first.columns.get_loc("Cuisine_type")] = "martian"
+    first.iloc[5:10, first.columns.get_loc("Protein(g)")] = raw_frame["Protein(g)"].iloc[0]
+    data_loader.append_data(first, base_csv)
+    data_loader.append_data(raw_frame.iloc[7000:], base_csv)
+
+    snapshot = data_loader.get_snapshot(base_csv)
+    rebuilt = data_loader.build_indexes(snapshot.df)
+
+    order, expected_order = snapshot.indexes["protein_order"], rebuilt["protein_order"]
+    assert order.keys() == expected_order.keys()
+    for diet in expected_order:
+        np.testing.assert_array_equal(order[diet], expected_order[diet])
+
+    cube, expected_cube = snapshot.indexes["macro_cube"], rebuilt["macro_cube"]
+    assert (cube.diets, cube.cuisines) == (expected_cube.diets, expected_cube.cuisines)
+    np.testing.assert_array_equal(cube.count, expected_cube.count)
+    np.testing.assert_allclose(cube.sums, expected_cube.sums)
+    np.testing.assert_allclose(cube.sumsq, expected_cube.sumsq)
+
+    sketches, expected_sketches = snapshot.indexes["macro_sketches"], rebuilt["macro_sketches"]
+    assert sketches.diets.keys() == expected_sketches.diets.keys()
+    for diet in ["all"] + list(expected_sketches.diets):
+        got, expected = sketches.get(diet), expected_sketches.get(diet)
+        assert got["moments"].n == expected["moments"].n
+        np.testing.assert_allclose(got["moments"].mean, expected["moments"].mean)
+        np.testing.assert_allclose(got["moments"].comoment, expected["moments"].comoment)
+        for macro, hist in expected["hist"].items():
+            np.testing.assert_array_equal(got["hist"][macro].counts, hist.counts)
+            assert (got["hist"][macro].min, got["hist"][macro].max) == (hist.min, hist.max)
+
+
+def test_append_during_first_load_is_not_lost(raw_frame, base_csv, monkeypatch):
+    # The first read is slow; any later read (a racing second load) is fast
+    read_csv = pd.read_csv
+    calls = []
+
+    def slow_read_csv(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(0.3)
+        return read_csv(*args, **kwargs)
+
+    monkeypatch.setattr(data_loader.pd, "read_csv", slow_read_csv)
+    loader = threading.Thread(target=data_loader.get_snapshot, args=(base_csv,))
+    loader.start()
+    time.sleep(0.05)
+    result = data_loader.append_data(raw_frame.iloc[6000:6010], base_csv)
+    loader.join()
+
+    assert result["rows"] == 6010
+    assert len(data_loader.get_snapshot(base_csv).df) == 6010
+    assert len(calls) == 1
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import azure_cleanup, jobs, main
+
+
+class FakeDeletePoller:
+    def __init__(self, gate):
+        self._gate = gate
+
+    def status(self):
+        return "Succeeded" if self._gate.is_set() else "InProgress"
+
+    async def result(self):
+        while not self._gate.is_set():
+            await asyncio.sleep(0.01)
+
+
+class FakeResourceGroups:
+    def __init__(self, gate):
+        self._gate = gate
+
+    async def get(self, name):
+        if name != "test-rg":
+            raise LookupError("ResourceGroupNotFound")
+
+    async def begin_delete(self, name):
+        return FakeDeletePoller(self._gate)
+
+
+class FakeResourceClient:
+    """Async stand-in for the resource-management client; deletes wait on `gate`."""
+    gate = threading.Event()
+    created = 0
+
+    def __init__(self, subscription_id):
+        FakeResourceClient.created += 1
+        self.resource_groups = FakeResourceGroups(self.gate)
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("AZURE_SUBSCRIPTION_ID", "sub")
+    monkeypatch.setenv("AZURE_RESOURCE_GROUP", "test-rg")
+    monkeypatch.setattr(main, "JOBS", jobs.JobManager())
+    FakeResourceClient.gate = threading.Event()
+    FakeResourceClient.created = 0
+    azure_cleanup.configure(FakeResourceClient)
+    # Enter the client so background jobs keep their event loop between requests
+    with TestClient(main.app) as client:
+        yield client
+    azure_cleanup.configure()
+
+
+def wait_for(client, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] in jobs.TERMINAL:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_cleanup_runs_in_background_and_deduplicates(client):
+    first = client.post("/cloud/cleanup")
+    assert first.status_code == 202
+    assert not first.json()["deduplicated"]
+    job_id = first.json()["job"]["id"]
+
+    second = client.post("/cloud/cleanup").json()
+    assert second["deduplicated"] and second["job"]["id"] == job_id
+
+    FakeResourceClient.gate.set()
+    job = wait_for(client, job_id)
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"deleted_resource_group": "test-rg"}
+    assert FakeResourceClient.created == 1
+
+    # Once finished, a new request starts a new job
+    third = client.post("/cloud/cleanup").json()
+    assert not third["deduplicated"] and third["job"]["id"] != job_id
+
+
+def test_failed_cleanup_reports_error(client, monkeypatch):
+    monkeypatch.setenv("AZURE_RESOURCE_GROUP", "missing-rg")
+    job_id = client.post("/cloud/cleanup").json()["job"]["id"]
+    job = wait_for(client, job_id)
+    assert job["status"] == "failed"
+    assert "missing-rg" in job["error"]
+
+
+def test_missing_settings_fail_fast(client, monkeypatch):
+    monkeypatch.delenv("AZURE_RESOURCE_GROUP")
+    assert client.post("/cloud/cleanup").status_code == 500
+
+
+def test_events_stream_ends_with_summary(client):
+    job_id = client.post("/cloud/cleanup").json()["job"]["id"]
+    FakeResourceClient.gate.set()
+
+    events = []
+    with client.stream("GET", f"/jobs/{job_id}/events") as res:
+        assert res.headers["content-type"].startswith("text/event-stream")
+        event = None
+        for line in res.iter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                events.append((event, json.loads(line[len("data: "):])))
+
+    assert events[0][0] == "progress"
+    assert events[-1][0] == "end"
+    assert events[-1][1]["id"] == job_id and events[-1][1]["status"] == "succeeded"
+
+
+def test_unknown_job_is_404(client):
+    assert client.get("/jobs/nope").status_code == 404
+    assert client.get("/jobs/nope/events").status_code == 404
+
+
+def test_shutdown_cancels_running_jobs():
+    async def scenario():
+        manager = jobs.JobManager()
+        job, created = manager.submit("test", "key", lambda progress: asyncio.sleep(60))
+        duplicate, duplicate_created = manager.submit("test", "key", lambda progress: asyncio.sleep(0))
+        await asyncio.sleep(0)
+        await manager.shutdown()
+        return job, created, duplicate, duplicate_created
+
+    job, created, duplicate, duplicate_created = asyncio.run(scenario())
+    assert created and not duplicate_created and duplicate is job
+    assert job.status == jobs.FAILED
+    assert job.error == "cancelled"
@@ -0,0 +1,65 @@
+import smtplib
+from email.message import EmailMessage
+
+import pytest
+
+from app.mailer import SMTPDeliveryQueue
+
+
+class FakeSMTP:
+    """Records sessions and messages; subjects starting with "boom" raise."""
+    sessions = 0
+    sent = []
+
+    def __init__(self, host, port, timeout=None):
+        FakeSMTP.sessions += 1
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def send_message(self, msg):
+        if msg["Subject"].startswith("boom"):
+            raise ValueError("cannot encode message")
+        FakeSMTP.sent.append(msg["Subject"])
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    FakeSMTP.sessions, FakeSMTP.sent = 0, []
+    monkeypatch.setattr(smtplib, "SMTP", FakeSMTP)
+    queue = SMTPDeliveryQueue("smtp.test", 25, user="u", password="p")
+    yield queue
+    queue.stop()
+
+
+def message(subject):
+    msg = EmailMessage()
+    msg["Subject"] = subject
+    msg.set_content("body")
+    return msg
+
+
+def test_messages_share_one_connection(queue):
+    tickets = [queue.submit(message(f"m{i}")) for i in range(5)]
+    assert [queue.wait(t, timeout=5)["status"] for t in tickets] == ["sent"] * 5
+    assert FakeSMTP.sent == [f"m{i}" for i in range(5)]
+    assert FakeSMTP.sessions == 1
+
+
+def test_unexpected_error_fails_ticket_and_keeps_worker(queue):
+    bad = queue.submit(message("boom"))
+    good = queue.submit(message("after"))
+
+    assert queue.wait(bad, timeout=5)["status"] == "failed"
+    assert "ValueError" in queue.status(bad)["error"]
+    assert queue.wait(good, timeout=5)["status"] == "sent"
+
+    later = queue.submit(message("later"))
+    assert queue.wait(later, timeout=5)["status"] == "sent"
+    assert FakeSMTP.sent == ["after", "later"]
@@ -0,0 +1,108 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app import http_client, main
+
+
+class FakeProvider:
+    """
+    MockTransport handler that replays queued responses (or raises queued
+    exceptions) per (method, url); the last one is repeated.
+    """
+
+    def __init__(self):
+        self.responses = {}
+        self.requests = []
+
+    def add(self, method, url, *responses):
+        self.responses.setdefault((method, url), []).extend(responses)
+
+    def __call__(self, request):
+        self.requests.append(request)
+        queue = self.responses[(request.method, str(request.url))]
+        response = queue.pop(0) if len(queue) > 1 else queue[0]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def calls(self, method, url):
+        return sum(1 for r in self.requests if (r.method, str(r.url)) == (method, url))
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    monkeypatch.setattr(main, "GITHUB_CLIENT_ID", "gh-id")
+    monkeypatch.setattr(main, "GITHUB_CLIENT_SECRET", "gh-secret")
+    monkeypatch.setattr(main, "GOOGLE_CLIENT_ID", "g-id")
+    monkeypatch.setattr(main, "GOOGLE_CLIENT_SECRET", "g-secret")
+    fake = FakeProvider()
+    asyncio.run(http_client.aclose())
+    http_client.configure(transport=httpx.MockTransport(fake))
+    yield fake
+    http_client.configure()
+
+
+@pytest.fixture
+def client(provider):
+    # The lifespan closes the shared HTTP client on exit
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_github_callback_returns_profile(provider, client):
+    provider.add("POST", main.GITHUB_TOKEN_URL, httpx.Response(200, json={"access_token": "tok"}))
+    provider.add("GET", main.GITHUB_USER_URL, httpx.Response(
+        200, json={"login": "octo", "name": "Octo Cat", "avatar_url": "https://a/1", "id": 1}))
+
+    res = client.get("/auth/github/callback", params={"code": "abc"})
+    assert res.status_code == 200
+    assert res.json() == {
+        "provider": "github", "login": "octo", "name": "Octo Cat", "avatar_url": "https://a/1"}
+
+    token_request, user_request = provider.requests
+    assert b"code=abc" in token_request.content
+    assert user_request.headers["Authorization"] == "Bearer tok"
+
+
+def test_github_token_error_is_reported(provider, client):
+    provider.add("POST", main.GITHUB_TOKEN_URL, httpx.Response(200, json={"error": "bad_verification_code"}))
+
+    res = client.get("/auth/github/callback", params={"code": "abc"})
+    assert res.status_code == 500
+    assert "bad_verification_code" in res.json()["detail"]
+    assert provider.calls("GET", main.GITHUB_USER_URL) == 0
+
+
+def test_user_lookup_is_retried_on_503(provider, client):
+    provider.add("POST", main.GOOGLE_TOKEN_URL, httpx.Response(200, json={"access_token": "tok"}))
+    provider.add("GET", main.GOOGLE_USERINFO_URL,
+                 httpx.Response(503),
+                 httpx.Response(200, json={"email": "a@b.c", "name": "A", "picture": None}))
+
+    res = client.get("/auth/google/callback", params={"code": "abc"})
+    assert res.status_code == 200
+    assert res.json()["email"] == "a@b.c"
+    assert provider.calls("GET", main.GOOGLE_USERINFO_URL) == 2
+
+
+@pytest.mark.parametrize("route, token_url", [
+    ("/auth/github/callback", main.GITHUB_TOKEN_URL),
+    ("/auth/google/callback", main.GOOGLE_TOKEN_URL),
+])
+def test_code_exchange_is_not_retried(provider, client, route, token_url):
+    provider.add("POST", token_url, httpx.Response(503))
+
+    res = client.get(route, params={"code": "abc"})
+    assert res.status_code == 500
+    assert provider.calls("POST", token_url) == 1
+
+
+def test_unreachable_provider_is_reported(provider, client):
+    provider.add("POST", main.GITHUB_TOKEN_URL, httpx.ConnectError("connection refused"))
+
+    res = client.get("/auth/github/callback", params={"code": "abc"})
+    assert res.status_code == 500
+    assert "Failed to reach GitHub" in res.json()["detail"]
@@ -0,0 +1,48 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import profiling
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(profiling, "ENABLED", True)
+    monkeypatch.setattr(profiling, "TOKEN", None)
+    monkeypatch.setattr(profiling, "STORE", profiling.ProfileStore())
+    app = FastAPI()
+    profiling.install(app)
+
+    @app.get("/sync")
+    def sync_route():
+        return {"total": sum_of_squares(20_000)}
+
+    @app.get("/async")
+    async def async_route():
+        return {"total": sum_of_squares(20_000)}
+
+    return TestClient(app)
+
+
+def sum_of_squares(n):
+    return sum(i * i for i in range(n))
+
+
+@pytest.mark.parametrize("path", ["/sync", "/async"])
+def test_profiled_route_records_handler(client, path):
+    res = client.get(path, headers={"X-Profile": "1"})
+    assert res.status_code == 200
+    profile_id = res.headers["x-profile-id"]
+
+    listing = client.get("/debug/profiles").json()
+    assert [p["id"] for p in listing["recent"]] == [profile_id]
+
+    report = client.get(f"/debug/profiles/{profile_id}", params={"format": "text"})
+    assert report.status_code == 200
+    assert "sum_of_squares" in report.text
+
+
+def test_unflagged_request_is_not_profiled(client):
+    res = client.get("/sync")
+    assert res.status_code == 200
+    assert "x-profile-id" not in res.headers
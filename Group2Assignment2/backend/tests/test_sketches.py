@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.sketches import HIST_BINS, HIST_MAX, HistogramSketch, MacroSketches, MomentSketch
+from app.utils import NUM_COLS, normalize_columns
+
+# Width of one histogram bin in log1p space: the quantile error bound
+BIN_WIDTH = np.log1p(HIST_MAX) / HIST_BINS
+
+
+@pytest.fixture(scope="module")
+def df(raw_frame):
+    return normalize_columns(raw_frame)
+
+
+def test_moment_merge_equals_sketch_of_union(df):
+    x = df[NUM_COLS].to_numpy(dtype=np.float64)
+    merged = MomentSketch.from_array(x[:2500]).merge(MomentSketch.from_array(x[2500:]))
+    whole = MomentSketch.from_array(x)
+
+    assert merged.n == whole.n == len(df)
+    np.testing.assert_allclose(merged.mean, whole.mean)
+    np.testing.assert_allclose(merged.comoment, whole.comoment)
+    np.testing.assert_allclose(merged.covariance(), np.cov(x, rowvar=False))
+    np.testing.assert_allclose(merged.correlation(), df[NUM_COLS].corr().to_numpy())
+
+    empty = MomentSketch.empty(len(NUM_COLS))
+    assert empty.merge(whole).n == whole.merge(empty).n == whole.n
+
+
+def test_macro_sketches_merge_equals_sketch_of_union(df):
+    merged = MacroSketches.from_frame(df.iloc[:3000]).merge(MacroSketches.from_frame(df.iloc[3000:]))
+    whole = MacroSketches.from_frame(df)
+
+    assert merged.diets.keys() == whole.diets.keys()
+    for diet in ["all"] + list(whole.diets):
+        got, expected = merged.get(diet), whole.get(diet)
+        np.testing.assert_allclose(got["moments"].comoment, expected["moments"].comoment)
+        for macro in NUM_COLS:
+            np.testing.assert_array_equal(got["hist"][macro].counts, expected["hist"][macro].counts)
+            assert got["hist"][macro].min == expected["hist"][macro].min
+
+
+@pytest.mark.parametrize("macro", NUM_COLS)
+def test_quantiles_are_within_one_bin_of_exact(df, macro):
+    values = df[macro]
+    qs = [0.05, 0.25, 0.5, 0.75, 0.95]
+    approx = HistogramSketch.from_array(values.to_numpy(dtype=np.float64)).quantiles(qs)
+    exact = values.quantile(qs).to_numpy()
+
+    # ~1.8% of (1 + value), i.e. one bin width in log1p space
+    np.testing.assert_array_less(np.abs(np.log1p(approx) - np.log1p(exact)), BIN_WIDTH)
+
+
+def test_histogram_counts_sum_to_n(df):
+    hist = HistogramSketch.from_array(df["fat_g"].to_numpy(dtype=np.float64))
+    for bins in (1, 7, 20, 200):
+        result = hist.histogram(bins)
+        assert len(result["edges"]) == bins + 1
+        assert sum(result["counts"]) == hist.n == len(df)
+        assert min(result["counts"]) >= 0
+
+
+def test_empty_histogram():
+    hist = HistogramSketch.from_array(np.array([]))
+    assert hist.quantiles([0.5]) == [None]
+    assert hist.histogram(10) == {"edges": [], "counts": []}
+
+
+@pytest.fixture
+def client(base_csv, monkeypatch):
+    monkeypatch.setattr(main, "CSV_PATH", base_csv)
+    return TestClient(main.app)
+
+
+def test_corr_endpoint(client, raw_frame):
+    keto = normalize_columns(raw_frame.iloc[:6000]).query("diet_type == 'keto'")[NUM_COLS]
+
+    res = client.get("/insights/corr", params={"diet": "Keto"})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["diet_type"] == "keto" and body["count"] == len(keto)
+    np.testing.assert_allclose(body["correlation"], keto.corr().to_numpy())
+    assert body["means"]["protein_g"] == pytest.approx(keto["protein_g"].mean())
+
+    assert client.get("/insights/corr").json()["count"] == 6000
+    assert client.get("/insights/corr", params={"diet": "nope"}).status_code == 404
+
+
+def test_distribution_endpoint(client):
+    res = client.get("/insights/distribution", params={"macro": "carbs", "q": "0.5,0.9", "bins": 5})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["macro"] == "carbs_g" and body["count"] == 6000
+    assert list(body["quantiles"]) == ["0.5", "0.9"]
+    assert sum(body["histogram"]["counts"]) == 6000
+
+
+@pytest.mark.parametrize("params, status", [
+    ({"macro": "sugar"}, 400),
+    ({"q": "0.5,abc"}, 400),
+    ({"q": "1.5"}, 400),
+    ({"bins": 0}, 422),
+    ({"diet": "nope"}, 404),
+])
+def test_distribution_rejects_bad_input(client, params, status):
+    assert client.get("/insights/distribution", params=params).status_code == status
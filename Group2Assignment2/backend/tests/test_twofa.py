@@ -0,0 +1,60 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import code_store, main
+
+
+class FakeMailer:
+    def __init__(self):
+        self.messages = []
+
+    def submit(self, msg):
+        self.messages.append(msg)
+        return f"t{len(self.messages)}"
+
+    def stop(self):
+        pass
+
+
+class BrokenStore:
+    def put(self, user, code, ttl):
+        raise OSError("database is locked")
+
+
+@pytest.fixture
+def mailer(monkeypatch):
+    mailer = FakeMailer()
+    monkeypatch.setattr(main, "TWOFA_MAILER", mailer)
+    monkeypatch.setattr(main, "TWOFA_EMAIL_FROM", "app@example.com")
+    monkeypatch.setattr(main, "TWOFA_RECIPIENTS", ["alice@example.com", "bob@example.com"])
+    monkeypatch.setattr(main, "TWOFA_STORE", code_store.MemoryCodeStore())
+    return mailer
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+def test_send_then_verify_per_user(client, mailer):
+    res = client.post("/auth/2fa/send", json={"user": "bob@example.com"})
+    assert res.status_code == 200 and res.json()["ticket"] == "t1"
+    code = mailer.messages[0].get_content().split("code is: ")[1][:6]
+    assert mailer.messages[0]["To"] == "bob@example.com"
+
+    # Another user's code does not verify for bob
+    assert not client.post("/auth/2fa/verify", json={"code": code}).json()["success"]
+    res = client.post("/auth/2fa/verify", json={"code": code, "user": "bob@example.com"})
+    assert res.json()["success"]
+
+
+def test_code_is_stored_before_the_email_is_queued(client, mailer, monkeypatch):
+    monkeypatch.setattr(main, "TWOFA_STORE", BrokenStore())
+    res = client.post("/auth/2fa/send")
+    assert res.status_code == 500
+    assert mailer.messages == []
+
+
+def test_unknown_user_is_rejected(client, mailer):
+    assert client.post("/auth/2fa/send", json={"user": "eve@example.com"}).status_code == 400
+    assert mailer.messages == []
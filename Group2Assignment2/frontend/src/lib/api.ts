@@ -38,7 +38,30 @@ export async function fetchRecipesByDiet(diet: string = "all") {
   return r.json();
 }
 
-export async function triggerCloudCleanup() {
+export type Job = {
+  id: string;
+  kind: string;
+  status: "queued" | "running" | "succeeded" | "failed";
+  message: string;
+  result: any;
+  error: string | null;
+};
+
+export async function fetchJob(id: string): Promise<Job> {
+  const r = await fetch(`${BASE}/jobs/${encodeURIComponent(id)}`);
+
+  if (!r.ok) {
+    const msg = await r.text();
+    throw new Error(msg || "Failed to fetch job status");
+  }
+
+  return r.json();
+}
+
+export async function triggerCloudCleanup(
+  onProgress?: (message: string) => void,
+  pollMs: number = 2000
+) {
   const r = await fetch(`${BASE}/cloud/cleanup`, {
     method: "POST",
   });
@@ -48,7 +71,19 @@ export async function triggerCloudCleanup() {
     throw new Error(msg || "Failed to clean up cloud resources");
   }
 
-  return r.json();
+  // The server runs the cleanup as a background job; poll until it finishes
+  let job: Job = (await r.json()).job;
+  while (job.status === "queued" || job.status === "running") {
+    onProgress?.(job.message);
+    await new Promise((resolve) => setTimeout(resolve, pollMs));
+    job = await fetchJob(job.id);
+  }
+
+  if (job.status === "failed") {
+    throw new Error(job.error || "Failed to clean up cloud resources");
+  }
+
+  return { status: "ok", result: job.result };
 }
 
 export async function fetchSecurityStatus(): Promise<SecurityStatus> {
@@ -65,6 +100,7 @@ export async function fetchSecurityStatus(): Promise<SecurityStatus> {
 export type TwoFASendResponse = {
   success: boolean;
   message: string;
+  ticket?: string;
 };
 
 export async function sendTwoFactorCode(): Promise<TwoFASendResponse> {
@@ -0,0 +1,556 @@
+# Benchmarks the data pipeline and API against synthetic All_Diets datasets.
+#
+# Usage (from the repository root):
+#   python benchmarks/run_benchmarks.py                      # x10 and x100, compare to baseline
+#   python benchmarks/run_benchmarks.py --scales 10,100,1000 # include the 1000x dataset
+#   python benchmarks/run_benchmarks.py --update-baseline    # record a new baseline
+#   python benchmarks/run_benchmarks.py --only api/          # run a subset of cases
+import argparse
+import contextlib
+import gc
+import importlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+from unittest import mock
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import pandas as pd # type: ignore
+
+from synthetic_data import dataset_path, write_csv
+
+ROOT = Path(__file__).resolve().parents[1]
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = ROOT / "Group2Assignment2" / "backend"
+BATCH_SRC_DIR = ROOT / "Group2Assignment1" / "src"
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+DEFAULT_CACHE = BENCH_DIR / ".data"
+
+
+# -------------------------------------------------------------
+# Benchmark case definitions
+# -------------------------------------------------------------
+@dataclass
+class Case:
+    """
+    A single benchmark: `setup` runs once per scale (untimed) and returns the
+    callable that is timed. `max_scale` skips cases whose cost is dominated by
+    per-row Python work at very large scales unless --no-limits is given.
+    """
+    name: str
+    setup: Callable[["Context"], Callable[[], object]]
+    max_scale: Optional[float] = None
+
+
+@dataclass
+class Context:
+    """Per-scale state shared by the benchmark cases."""
+    scale: float
+    csv_path: Path
+    work_dir: Path
+    cache: dict = field(default_factory=dict)
+
+    def raw_frame(self) -> pd.DataFrame:
+        if "raw" not in self.cache:
+            self.cache["raw"] = pd.read_csv(self.csv_path)
+        return self.cache["raw"]
+
+
+def _backend():
+    """Import the FastAPI backend package (Group2Assignment2/backend/app)."""
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    return (
+        importlib.import_module("app.main"),
+        importlib.import_module("app.data_loader"),
+        importlib.import_module("app.utils"),
+    )
+
+
+def _batch(module_name: str, ctx: Context):
+    """
+    Import one of the Group2Assignment1 batch scripts and redirect its
+    input/output paths into the benchmark work directory.
+    """
+    if str(BATCH_SRC_DIR) not in sys.path:
+        sys.path.insert(0, str(BATCH_SRC_DIR))
+
+    # lambda_function creates its output folder relative to the CWD on import
+    with contextlib.chdir(ctx.work_dir):
+        module = importlib.import_module(module_name)
+
+    if hasattr(module, "CSV_PATH"):
+        module.CSV_PATH = ctx.csv_path
+    if hasattr(module, "OUT_DIR"):
+        module.OUT_DIR = ctx.work_dir
+    if hasattr(module, "OUT_JSON"):
+        module.OUT_JSON = ctx.work_dir / "results.json"
+    return module
+
+
+# --- Backend helpers ----------------------------------------------------------
+
+def setup_load_data(ctx: Context):
+    _, data_loader, _ = _backend()
+
+    def run():
+        # Force a cold load on every iteration
+        data_loader._SNAPSHOT = None
+        return data_loader.load_data(ctx.csv_path)
+    return run
+
+
+def setup_append_data(ctx: Context):
+    """Append 1,000 raw rows to the loaded dataset (incremental index updates)."""
+    _, data_loader, _ = _backend()
+    data_loader._SNAPSHOT = None
+    data_loader.load_data(ctx.csv_path)
+    delta = pd.read_csv(ctx.csv_path, nrows=1000)
+    return lambda: data_loader.append_data(delta, ctx.csv_path)
+
+
+# Cold start in a fresh interpreter: import app.main, run the lifespan
+# preload against the benchmark dataset and answer /health.
+COLD_START_SCRIPT = """
+import sys
+from pathlib import Path
+import app.main as main
+from fastapi.testclient import TestClient
+main.CSV_PATH = Path(sys.argv[1])
+with TestClient(main.app) as client:
+    client.get("/health").raise_for_status()
+"""
+
+
+def setup_cold_start(ctx: Context):
+    def run():
+        subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", COLD_START_SCRIPT, str(ctx.csv_path)],
+            cwd=BACKEND_DIR, check=True,
+        )
+    return run
+
+
+def setup_normalize_columns(ctx: Context):
+    _, _, utils = _backend()
+    raw = ctx.raw_frame()
+    return lambda: utils.normalize_columns(raw.copy())
+
+
+def _setup_filter(diet: str):
+    def setup(ctx: Context):
+        _, _, utils = _backend()
+        df = utils.normalize_columns(ctx.raw_frame().copy())
+        return lambda: utils.filter_by_diet(df, diet)
+    return setup
+
+
+def _fake_oauth_provider(request):
+    """httpx handler standing in for the GitHub/Google token and user endpoints."""
+    import httpx # type: ignore
+
+    if request.method == "POST":
+        return httpx.Response(200, json={"access_token": "bench-token"})
+    return httpx.Response(200, json={"login": "bench", "name": "Bench", "email": "bench@example.com"})
+
+
+class _FakeSMTP:
+    """Accepts every message and remembers the last one (to read back 2FA codes)."""
+    last_message = None
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def send_message(self, msg):
+        _FakeSMTP.last_message = msg
+
+    def quit(self):
+        pass
+
+
+def _fake_storage_client(credential, subscription_id):
+    blob = mock.Mock(enabled=True)
+    account = mock.Mock()
+    account.encryption.services.blob = blob
+    client = mock.Mock()
+    client.storage_accounts.get_properties.return_value = account
+    return client
+
+
+class _FakeDeletePoller:
+    def status(self):
+        return "Succeeded"
+
+    async def result(self):
+        return None
+
+
+class _FakeResourceGroups:
+    async def get(self, name):
+        return mock.Mock(name=name)
+
+    async def begin_delete(self, name):
+        return _FakeDeletePoller()
+
+
+class _FakeResourceClient:
+    """Async stand-in for azure.mgmt.resource.resources.aio.ResourceManagementClient."""
+
+    def __init__(self, subscription_id):
+        self.resource_groups = _FakeResourceGroups()
+
+    async def close(self):
+        pass
+
+
+def _fake_externals(main) -> contextlib.ExitStack:
+    """
+    Swap the Azure, OAuth and SMTP integrations for in-process fakes so the
+    external-service endpoints measure only our own request handling.
+    """
+    stack = contextlib.ExitStack()
+    stack.enter_context(mock.patch.dict(os.environ, {
+        "AZURE_SUBSCRIPTION_ID": "00000000-0000-0000-0000-000000000000",
+        "AZURE_RESOURCE_GROUP": "bench-rg",
+        "AZURE_STORAGE_ACCOUNT": "benchaccount",
+    }))
+    # The SDKs are imported lazily by the routes, so patch them at the source
+    azure_clients = importlib.import_module("app.azure_clients")
+    azure_clients.configure(credential_factory=object, storage_client_factory=_fake_storage_client)
+    stack.callback(azure_clients.configure)
+    azure_cleanup = importlib.import_module("app.azure_cleanup")
+    azure_cleanup.configure(_FakeResourceClient)
+    stack.callback(azure_cleanup.configure)
+    import httpx # type: ignore
+    http_client = importlib.import_module("app.http_client")
+    http_client.configure(transport=httpx.MockTransport(_fake_oauth_provider))
+    stack.callback(http_client.configure)
+    stack.enter_context(mock.patch("smtplib.SMTP", _FakeSMTP))
+    for name in ("GITHUB_CLIENT_ID", "GITHUB_CLIENT_SECRET",
+                 "GOOGLE_CLIENT_ID", "GOOGLE_CLIENT_SECRET",
+                 "TWOFA_SMTP_USER", "TWOFA_SMTP_PASS"):
+        stack.enter_context(mock.patch.object(main, name, "bench"))
+    stack.enter_context(mock.patch.object(main, "TWOFA_EMAIL_FROM", "bench@example.com"))
+    stack.enter_context(mock.patch.object(main, "TWOFA_RECIPIENTS", ["bench@example.com"]))
+    return stack
+
+
+def _client(ctx: Context):
+    """Create (once per scale) a TestClient bound to the synthetic dataset."""
+    if "client" not in ctx.cache:
+        from fastapi.testclient import TestClient # type: ignore
+
+        main, data_loader, _ = _backend()
+        main.CSV_PATH = ctx.csv_path
+        data_loader._SNAPSHOT = None
+
+        ctx.cache["externals"] = _fake_externals(main)
+        client = TestClient(main.app)
+        # Enter the client so the lifespan runs and background jobs keep
+        # their event loop between requests
+        client.__enter__()
+        ctx.cache["client"] = client
+        # Warm the dataset cache so endpoint timings exclude the CSV read
+        client.get("/insights/avg").raise_for_status()
+    return ctx.cache["client"]
+
+
+def _endpoint(method: str, path: str, **kwargs):
+    def setup(ctx: Context):
+        client = _client(ctx)
+
+        def run():
+            res = client.request(method, path, **kwargs)
+            res.raise_for_status()
+            return res
+        return run
+    return setup
+
+
+def _setup_twofa_verify(ctx: Context):
+    client = _client(ctx)
+    main, _, _ = _backend()
+
+    def run():
+        ticket = client.post("/auth/2fa/send").json()["ticket"]
+        main.TWOFA_MAILER.wait(ticket, timeout=10)
+        code = _FakeSMTP.last_message.get_content().split("code is: ")[1][:6]
+        res = client.post("/auth/2fa/verify", json={"code": code})
+        res.raise_for_status()
+        return res
+    return run
+
+
+def _setup_cloud_cleanup(ctx: Context):
+    client = _client(ctx)
+
+    def run():
+        job = client.post("/cloud/cleanup").json()["job"]
+        while job["status"] in ("queued", "running"):
+            time.sleep(0.001)
+            job = client.get(f"/jobs/{job['id']}").json()
+        assert job["status"] == "succeeded", job
+        return job
+    return run
+
+
+# --- Batch job helpers --------------------------------------------------------
+
+def setup_data_analysis(ctx: Context):
+    module = _batch("data_analysis", ctx)
+    return lambda: module.main()
+
+
+def setup_charts(ctx: Context):
+    module = _batch("charts", ctx)
+    return lambda: module.main()
+
+
+class _FakeBlob:
+    def __init__(self, data: bytes):
+        self._data = data
+
+    def download_blob(self):
+        return self
+
+    def readall(self):
+        return self._data
+
+
+class _FakeBlobService:
+    """Serves the synthetic CSV in place of the Azurite blob container."""
+
+    def __init__(self, data: bytes):
+        self._data = data
+
+    def get_blob_client(self, container, blob):
+        return _FakeBlob(self._data)
+
+
+def setup_lambda_handler(ctx: Context):
+    module = _batch("lambda_function", ctx)
+    module._blob_service = _FakeBlobService(ctx.csv_path.read_bytes())
+    return lambda: module.handler()
+
+
+CASES = [
+    Case("backend/cold_start", setup_cold_start),
+    Case("backend/load_data", setup_load_data),
+    Case("backend/append_data[1k rows]", setup_append_data),
+    Case("backend/normalize_columns", setup_normalize_columns),
+    Case("backend/filter_by_diet[all]", _setup_filter("all")),
+    Case("backend/filter_by_diet[keto]", _setup_filter("keto")),
+    Case("api/health", _endpoint("GET", "/health")),
+    Case("api/metrics", _endpoint("GET", "/metrics")),
+    Case("api/insights_avg[all]", _endpoint("GET", "/insights/avg")),
+    Case("api/insights_avg[keto]", _endpoint("GET", "/insights/avg", params={"diet": "keto"})),
+    Case("api/insights_cube", _endpoint("GET", "/insights/cube")),
+    Case("api/insights_cube[keto,by cuisine]", _endpoint(
+        "GET", "/insights/cube", params={"diet": "keto", "group_by": "cuisine_type"})),
+    Case("api/insights_corr", _endpoint("GET", "/insights/corr")),
+    Case("api/insights_distribution[keto,fat_g]", _endpoint(
+        "GET", "/insights/distribution", params={"diet": "keto", "macro": "fat_g"})),
+    Case("api/recipes_by_diet[all]", _endpoint("GET", "/recipes/by_diet"), max_scale=10),
+    Case("api/recipes_by_diet[keto]", _endpoint("GET", "/recipes/by_diet", params={"diet": "keto"}),
+         max_scale=10),
+    Case("api/clusters[k=4]", _endpoint("GET", "/clusters", params={"k": 4}), max_scale=10),
+    Case("api/security_status", _endpoint("GET", "/security/status")),
+    Case("api/cloud_cleanup", _setup_cloud_cleanup),
+    Case("api/github_callback", _endpoint("GET", "/auth/github/callback", params={"code": "x"})),
+    Case("api/google_callback", _endpoint("GET", "/auth/google/callback", params={"code": "x"})),
+    Case("api/2fa_send", _endpoint("POST", "/auth/2fa/send")),
+    Case("api/2fa_send_verify", _setup_twofa_verify),
+    Case("batch/data_analysis.main", setup_data_analysis),
+    Case("batch/charts.main", setup_charts),
+    Case("batch/lambda_function.handler", setup_lambda_handler),
+]
+
+
+# -------------------------------------------------------------
+# Measurement
+# -------------------------------------------------------------
+def measure(fn: Callable[[], object], repeat: int, memory: bool) -> dict:
+    """
+    Time `fn` `repeat` times and (optionally) record its peak traced memory
+    in one extra, separate run so tracing overhead does not skew the timings.
+
+    Returns:
+        dict: seconds (median), min_seconds, runs and peak_mb
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        times.append(time.perf_counter() - start)
+
+    peak_mb = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        peak_mb = round(peak / (1024 * 1024), 3)
+
+    return {
+        "seconds": round(statistics.median(times), 6),
+        "min_seconds": round(min(times), 6),
+        "runs": repeat,
+        "peak_mb": peak_mb,
+    }
+
+
+def run_scale(scale: float, args, work_root: Path) -> dict:
+    csv_path = write_csv(dataset_path(args.cache_dir, scale, args.seed), scale, args.seed)
+    work_dir = work_root / f"x{scale:g}"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    ctx = Context(scale=scale, csv_path=csv_path, work_dir=work_dir)
+
+    results = {}
+    try:
+        for case in CASES:
+            if args.only and not any(case.name.startswith(p) for p in args.only):
+                continue
+            key = f"x{scale:g}/{case.name}"
+
+            if case.max_scale is not None and scale > case.max_scale and not args.no_limits:
+                print(f"  {key:<48} skipped (scale > {case.max_scale:g}, use --no-limits)")
+                continue
+
+            fn = case.setup(ctx)
+            repeat = args.repeat if scale < 1000 else 1
+            results[key] = measure(fn, repeat, not args.no_memory)
+            r = results[key]
+            peak = "-" if r["peak_mb"] is None else f"{r['peak_mb']:.1f} MB"
+            print(f"  {key:<48} {r['seconds'] * 1000:10.2f} ms   peak {peak}")
+    finally:
+        # Leave the client first: its lifespan closes the shared HTTP client,
+        # which must happen before the fake transport is removed
+        if "client" in ctx.cache:
+            ctx.cache["client"].__exit__(None, None, None)
+        if "externals" in ctx.cache:
+            ctx.cache["externals"].close()
+
+    return results
+
+
+# -------------------------------------------------------------
+# Baseline comparison
+# -------------------------------------------------------------
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Print a comparison table against the stored baseline.
+
+    Returns:
+        list[str]: Keys whose time or peak memory regressed beyond `tolerance`
+    """
+    regressions = []
+    base = baseline.get("results", {})
+
+    print(f"\n{'case':<48} {'time':>10} {'vs base':>9} {'peak':>10} {'vs base':>9}")
+    for key, cur in results.items():
+        ref = base.get(key)
+        if not ref:
+            print(f"{key:<48} {cur['seconds'] * 1000:8.2f}ms {'new':>9}")
+            continue
+
+        t_ratio = cur["seconds"] / ref["seconds"] if ref["seconds"] else 1.0
+        m_ratio = None
+        if cur.get("peak_mb") is not None and ref.get("peak_mb"):
+            m_ratio = cur["peak_mb"] / ref["peak_mb"]
+
+        flag = ""
+        if t_ratio > 1 + tolerance or (m_ratio is not None and m_ratio > 1 + tolerance):
+            regressions.append(key)
+            flag = "  REGRESSION"
+
+        peak = "-" if cur.get("peak_mb") is None else f"{cur['peak_mb']:.1f}MB"
+        m_txt = "-" if m_ratio is None else f"{m_ratio:.2f}x"
+        print(f"{key:<48} {cur['seconds'] * 1000:8.2f}ms {t_ratio:8.2f}x {peak:>10} {m_txt:>9}{flag}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the All_Diets pipeline and API.")
+    parser.add_argument("--scales", default="10,100",
+                        help="Comma-separated dataset multipliers (default: 10,100)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Timed runs per case (a single run is used at >=1000x)")
+    parser.add_argument("--only", action="append", default=[],
+                        help="Only run cases whose name starts with this prefix (repeatable)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip peak-memory measurement")
+    parser.add_argument("--no-limits", action="store_true",
+                        help="Also run row-by-row cases above their max_scale")
+    parser.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE,
+                        help="Where generated datasets are cached")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Merge these results into the baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown / memory growth before flagging (default: 0.25)")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 if any case regresses")
+    parser.add_argument("--output", type=Path, help="Also write the raw results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="diet-bench-") as tmp:
+        for s in args.scales.split(","):
+            scale = float(s)
+            print(f"[info] scale x{scale:g}")
+            results.update(run_scale(scale, args, Path(tmp)))
+
+    meta = {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "seed": args.seed,
+    }
+
+    if args.output:
+        args.output.write_text(json.dumps({"meta": meta, "results": results}, indent=2) + "\n")
+
+    baseline = {}
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.update_baseline:
+        merged = {"meta": meta, "results": {**baseline.get("results", {}), **results}}
+        merged["results"] = dict(sorted(merged["results"].items()))
+        args.baseline.write_text(json.dumps(merged, indent=2) + "\n")
+        print(f"\n[done] baseline updated: {args.baseline}")
+
+    if regressions:
+        print(f"\n[warn] {len(regressions)} case(s) regressed by more than {args.tolerance:.0%}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# Generates deterministic, All_Diets-shaped CSV files for benchmarking.
+import argparse
+from pathlib import Path
+
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+
+# Number of rows in the real All_Diets.csv; scale factors multiply this.
+BASE_ROWS = 7806
+
+# Column order of the real dataset (raw, un-normalized headers)
+COLUMNS = [
+    "Diet_type", "Recipe_name", "Cuisine_type",
+    "Protein(g)", "Carbs(g)", "Fat(g)",
+    "Extraction_day", "Extraction_time",
+]
+
+# -------------------------------------------------------------
+# Distributions measured on the real dataset
+# -------------------------------------------------------------
+
+# Row share of each diet type
+DIET_WEIGHTS = {
+    "mediterranean": 1753,
+    "dash": 1745,
+    "vegan": 1522,
+    "keto": 1512,
+    "paleo": 1274,
+}
+
+# Cuisine counts per diet (crosstab of the real data), which keeps the
+# heavy skew such as "mediterranean" recipes dominating the mediterranean diet.
+CUISINE_BY_DIET = {
+    "american":         {"dash": 639, "keto": 663, "mediterranean": 145, "paleo": 535, "vegan": 925},
+    "asian":            {"dash": 24, "keto": 11, "mediterranean": 12, "paleo": 12, "vegan": 67},
+    "british":          {"dash": 64, "keto": 90, "mediterranean": 4, "paleo": 54, "vegan": 27},
+    "caribbean":        {"dash": 3, "keto": 7, "mediterranean": 1, "paleo": 6, "vegan": 1},
+    "central europe":   {"dash": 9, "keto": 11, "mediterranean": 1, "paleo": 9, "vegan": 4},
+    "chinese":          {"dash": 38, "keto": 38, "mediterranean": 1, "paleo": 26, "vegan": 17},
+    "eastern europe":   {"dash": 10, "keto": 11, "mediterranean": 3, "paleo": 27, "vegan": 4},
+    "french":           {"dash": 150, "keto": 163, "mediterranean": 61, "paleo": 154, "vegan": 76},
+    "indian":           {"dash": 20, "keto": 12, "mediterranean": 3, "paleo": 9, "vegan": 48},
+    "italian":          {"dash": 165, "keto": 234, "mediterranean": 148, "paleo": 171, "vegan": 81},
+    "japanese":         {"dash": 9, "keto": 10, "mediterranean": 2, "paleo": 5, "vegan": 24},
+    "kosher":           {"dash": 5, "keto": 0, "mediterranean": 0, "paleo": 2, "vegan": 0},
+    "mediterranean":    {"dash": 176, "keto": 89, "mediterranean": 1274, "paleo": 106, "vegan": 99},
+    "mexican":          {"dash": 61, "keto": 60, "mediterranean": 17, "paleo": 48, "vegan": 38},
+    "middle eastern":   {"dash": 21, "keto": 17, "mediterranean": 26, "paleo": 12, "vegan": 15},
+    "nordic":           {"dash": 32, "keto": 35, "mediterranean": 31, "paleo": 45, "vegan": 9},
+    "south american":   {"dash": 54, "keto": 21, "mediterranean": 10, "paleo": 21, "vegan": 31},
+    "south east asian": {"dash": 31, "keto": 34, "mediterranean": 8, "paleo": 29, "vegan": 46},
+    "world":            {"dash": 234, "keto": 6, "mediterranean": 6, "paleo": 3, "vegan": 10},
+}
+
+# Mean and standard deviation of log1p(grams) per diet for protein, carbs, fat.
+# Macros in the real data are right-skewed, so a log-normal fits well.
+MACRO_LOG_PARAMS = {
+    "dash":          ((3.33, 1.67), (4.33, 1.40), (3.57, 1.87)),
+    "keto":          ((4.11, 1.16), (3.60, 0.97), (4.73, 0.91)),
+    "mediterranean": ((4.19, 1.05), (4.57, 1.07), (4.26, 0.94)),
+    "paleo":         ((3.95, 1.17), (4.39, 1.04), (4.50, 1.07)),
+    "vegan":         ((3.72, 0.89), (5.19, 0.93), (4.21, 1.02)),
+}
+
+# Vocabulary used to build plausible recipe names
+NAME_ADJECTIVES = [
+    "Easy", "Spicy", "Roasted", "Grilled", "Creamy", "Crispy", "Quick",
+    "Slow-Cooker", "Healthy", "Classic", "Smoky", "Zesty", "Rustic", "Lemon",
+]
+NAME_BASES = [
+    "Chicken", "Salmon", "Beef", "Lentil", "Chickpea", "Tofu", "Pork",
+    "Shrimp", "Turkey", "Cauliflower", "Quinoa", "Egg", "Mushroom", "Lamb",
+]
+NAME_DISHES = [
+    "Salad", "Stew", "Curry", "Bowl", "Soup", "Skillet", "Tacos", "Bake",
+    "Stir-Fry", "Wraps", "Casserole", "Kebabs", "Frittata", "Chili",
+]
+
+DIETS = list(DIET_WEIGHTS)
+CUISINES = list(CUISINE_BY_DIET)
+
+
+def generate_frame(scale: float, seed: int = 42, dirty: bool = True) -> pd.DataFrame:
+    """
+    Build a synthetic DataFrame with the same columns and skew as All_Diets.csv.
+
+    Args:
+        scale (float): Row multiplier relative to the real dataset (e.g. 10, 100, 1000)
+        seed (int): Random seed; the same (scale, seed) always yields the same frame
+        dirty (bool): Inject mixed-case labels, stray whitespace and a few blank
+            or non-numeric macro values so that normalize_columns has real work to do
+
+    Returns:
+        pd.DataFrame: Raw (un-normalized) frame with the original CSV headers
+    """
+    rng = np.random.default_rng(seed)
+    n = max(1, int(round(BASE_ROWS * scale)))
+
+    diet_p = np.array([DIET_WEIGHTS[d] for d in DIETS], dtype=float)
+    diet_idx = rng.choice(len(DIETS), size=n, p=diet_p / diet_p.sum())
+
+    cuisine_idx = np.empty(n, dtype=np.int64)
+    protein = np.empty(n)
+    carbs = np.empty(n)
+    fat = np.empty(n)
+
+    for i, diet in enumerate(DIETS):
+        mask = diet_idx == i
+        count = int(mask.sum())
+        if count == 0:
+            continue
+
+        cuisine_p = np.array([CUISINE_BY_DIET[c][diet] for c in CUISINES], dtype=float)
+        cuisine_idx[mask] = rng.choice(len(CUISINES), size=count, p=cuisine_p / cuisine_p.sum())
+
+        (pm, ps), (cm, cs), (fm, fs) = MACRO_LOG_PARAMS[diet]
+        protein[mask] = np.expm1(rng.normal(pm, ps, count)).clip(min=0)
+        carbs[mask] = np.expm1(rng.normal(cm, cs, count)).clip(min=0)
+        fat[mask] = np.expm1(rng.normal(fm, fs, count)).clip(min=0)
+
+    adjectives = np.array(NAME_ADJECTIVES, dtype=object)[rng.integers(0, len(NAME_ADJECTIVES), n)]
+    bases = np.array(NAME_BASES, dtype=object)[rng.integers(0, len(NAME_BASES), n)]
+    dishes = np.array(NAME_DISHES, dtype=object)[rng.integers(0, len(NAME_DISHES), n)]
+    names = adjectives + " " + bases + " " + dishes
+
+    df = pd.DataFrame({
+        "Diet_type": np.array(DIETS, dtype=object)[diet_idx],
+        "Recipe_name": names,
+        "Cuisine_type": np.array(CUISINES, dtype=object)[cuisine_idx],
+        "Protein(g)": protein.round(2),
+        "Carbs(g)": carbs.round(2),
+        "Fat(g)": fat.round(2),
+        "Extraction_day": "10/16/2022",
+        "Extraction_time": "17:20:09",
+    }, columns=COLUMNS)
+
+    if dirty:
+        # ~1% of labels get inconsistent casing / padding
+        messy = rng.random(n) < 0.01
+        df.loc[messy, "Diet_type"] = " " + df.loc[messy, "Diet_type"].str.upper() + " "
+        messy = rng.random(n) < 0.01
+        df.loc[messy, "Cuisine_type"] = df.loc[messy, "Cuisine_type"].str.title() + " "
+
+        # ~0.2% of macro cells are blank or unparseable
+        for col in ("Protein(g)", "Carbs(g)", "Fat(g)"):
+            df[col] = df[col].astype(object)
+            df.loc[rng.random(n) < 0.001, col] = None
+            df.loc[rng.random(n) < 0.001, col] = "n/a"
+
+    return df
+
+
+def write_csv(path: Path, scale: float, seed: int = 42, dirty: bool = True) -> Path:
+    """
+    Generate a synthetic dataset and write it to a CSV file.
+    Reuses the file if it already exists, since generation is deterministic.
+
+    Args:
+        path (Path): Destination CSV path
+        scale (float): Row multiplier relative to the real dataset
+        seed (int): Random seed
+        dirty (bool): See generate_frame
+
+    Returns:
+        Path: The path that was written (or reused)
+    """
+    path = Path(path)
+    if path.exists():
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".partial")
+    generate_frame(scale, seed=seed, dirty=dirty).to_csv(tmp, index=False)
+    tmp.replace(path)
+    return path
+
+
+def dataset_path(cache_dir: Path, scale: float, seed: int = 42) -> Path:
+    """Return the cache file name used for a given scale and seed."""
+    return Path(cache_dir) / f"All_Diets_x{scale:g}_seed{seed}.csv"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic All_Diets CSV files.")
+    parser.add_argument("--scales", default="10,100,1000",
+                        help="Comma-separated row multipliers (default: 10,100,1000)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, default=Path(__file__).resolve().parent / ".data")
+    parser.add_argument("--clean", action="store_true",
+                        help="Do not inject messy labels or missing values")
+    args = parser.parse_args()
+
+    for s in args.scales.split(","):
+        out = write_csv(dataset_path(args.out, float(s), args.seed), float(s), args.seed, not args.clean)
+        print(f"[done] x{float(s):g} -> {out}")